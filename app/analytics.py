@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import os
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from app import auth, counters
+from app.cache import StaleWhileRevalidateCache
+from app.database import get_db
+from app.models import User
+from app.serialization import trusted_response
+from dotenv import load_dotenv
+
+load_dotenv()
+ANALYTICS_TTL_SECONDS = float(os.getenv("ANALYTICS_TTL_SECONDS", "60"))
+ANALYTICS_STALE_SECONDS = float(os.getenv("ANALYTICS_STALE_SECONDS", "600"))
+# When on, per-user post totals are read from the `userPostStats` summary
+# collection, which is refreshed incrementally with $merge instead of
+# regrouping all of forumPost.
+ANALYTICS_MATERIALIZE = os.getenv("ANALYTICS_MATERIALIZE", "0") == "1"
+
+USER_POST_STATS_COLLECTION = "userPostStats"
+WATERMARKS_COLLECTION = "analyticsWatermarks"
+
+Database = Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+result_cache = StaleWhileRevalidateCache(ttl=ANALYTICS_TTL_SECONDS, stale_ttl=ANALYTICS_STALE_SECONDS)
+
+
+async def _aggregate(collection, pipeline: list) -> list:
+    return await collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+
+# Posts created through the API store user_id as a string, the seed scripts as
+# an ObjectId; group on the ObjectId so each user gets a single row.
+_USER_ID = {"$convert": {"input": "$user_id", "to": "objectId", "onError": "$user_id", "onNull": None}}
+
+
+def _user_id_values(user_ids: list) -> list:
+    # Both stored representations of each user id, for $in matches.
+    return user_ids + [str(user_id) for user_id in user_ids if isinstance(user_id, ObjectId)]
+
+
+def _user_post_totals_pipeline(match: dict) -> list:
+    return [
+        {"$match": match},
+        {"$group": {"_id": _USER_ID, "posts": {"$sum": 1}}},
+    ]
+
+
+async def refresh_user_post_stats(db, full: bool = False) -> dict:
+    # Recounts the users who posted since the last run (by _id watermark) and
+    # overwrites their userPostStats rows. Totals are recomputed, never added
+    # to, so overlapping runs (several workers, /analytics/refresh) cannot
+    # double-count. A full rebuild also drops users whose posts were all deleted.
+    latest = await db.forumPost.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    if latest is None:
+        return {"processed_up_to": None}
+
+    if full:
+        # $out swaps the collection in atomically once the aggregation finishes.
+        await _aggregate(db.forumPost, _user_post_totals_pipeline({"_id": {"$lte": latest["_id"]}}) + [
+            {"$out": USER_POST_STATS_COLLECTION},
+        ])
+    else:
+        watermark = await db[WATERMARKS_COLLECTION].find_one({"_id": "user_post_totals"})
+        match = {"_id": {"$lte": latest["_id"]}}
+        if watermark is not None:
+            if watermark["last_id"] >= latest["_id"]:
+                return {"processed_up_to": watermark["last_id"]}
+            match["_id"]["$gt"] = watermark["last_id"]
+        user_ids = [row["_id"] for row in await _aggregate(db.forumPost, [
+            {"$match": match},
+            {"$group": {"_id": _USER_ID}},
+        ])]
+        await _aggregate(db.forumPost, _user_post_totals_pipeline({"user_id": {"$in": _user_id_values(user_ids)}}) + [
+            {"$merge": {"into": USER_POST_STATS_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ])
+    # $max keeps a slower concurrent run from moving the watermark backwards.
+    await db[WATERMARKS_COLLECTION].update_one(
+        {"_id": "user_post_totals"}, {"$max": {"last_id": latest["_id"]}}, upsert=True
+    )
+    return {"processed_up_to": latest["_id"]}
+
+
+async def _user_post_totals(db, user_id: Optional[str], limit: int) -> list:
+    if ANALYTICS_MATERIALIZE:
+        await refresh_user_post_stats(db)
+        query = {"_id": ObjectId(user_id)} if user_id else {}
+        return await db[USER_POST_STATS_COLLECTION].find(query).sort("posts", -1).limit(limit).to_list(limit)
+    match = {"user_id": {"$in": _user_id_values([ObjectId(user_id)])}} if user_id else {}
+    return await _aggregate(db.forumPost, _user_post_totals_pipeline(match) + [
+        {"$sort": {"posts": -1}},
+        {"$limit": limit},
+    ])
+
+
+async def _average_questions_per_test(db) -> dict:
+    tests = await db.testQuestion.estimated_document_count()
+    rows = await _aggregate(db.question, [
+        {"$group": {"_id": "$testQuestion_id", "questions": {"$sum": 1}}},
+        {"$group": {"_id": None, "questions": {"$sum": "$questions"}}},
+    ])
+    questions = rows[0]["questions"] if rows else 0
+    return {
+        "tests": tests,
+        "questions": questions,
+        "average_questions_per_test": questions / tests if tests else 0.0,
+    }
+
+
+@router.get("/user-post-totals")
+async def user_post_totals(
+    db: Database,
+    user_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    if user_id and not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID format")
+    rows = await result_cache.get(
+        ("user_post_totals", user_id, limit), lambda: _user_post_totals(db, user_id, limit)
+    )
+    return trusted_response([{"user_id": row["_id"], "posts": row["posts"]} for row in rows])
+
+
+@router.get("/popular-posts")
+async def popular_posts(db: Database, limit: int = Query(10, ge=1, le=100)):
+    # Served by the (comment_count, _id) index rather than a $lookup join.
+    async def compute():
+        cursor = db.forumPost.find({}, {"title": 1, "comment_count": 1}).sort([("comment_count", -1), ("_id", -1)])
+        return await cursor.limit(limit).to_list(limit)
+
+    return trusted_response(await result_cache.get(("popular_posts", limit), compute))
+
+
+@router.get("/comments-per-post")
+async def comments_per_post(db: Database):
+    return await result_cache.get("comments_per_post", lambda: counters.forum_stats(db))
+
+
+@router.get("/questions-per-test")
+async def questions_per_test(db: Database):
+    return await result_cache.get("questions_per_test", lambda: _average_questions_per_test(db))
+
+
+# Runs aggregations over all of forumPost (`full` rebuilds the collection), so
+# it is limited to moderators; cron jobs can use `python -m app.analytics`.
+@router.post("/refresh")
+async def refresh(
+    db: Database,
+    moderator: Annotated[User, Depends(auth.get_current_moderator)],
+    full: bool = False,
+):
+    result = await refresh_user_post_stats(db, full=full)
+    result_cache.invalidate()
+    return trusted_response(result)
+
+
+@router.get("/cache")
+async def cache_stats():
+    return result_cache.stats()
+
+
+def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.database import MONGO_DB_NAME, MONGO_URI
+
+    parser = argparse.ArgumentParser(description="Refresh the userPostStats summary collection.")
+    parser.add_argument("--full", action="store_true", help="rebuild from scratch instead of since the watermark")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(MONGO_URI)
+    result = asyncio.run(refresh_user_post_stats(client[MONGO_DB_NAME], full=args.full))
+    print(f"✅ userPostStats processed up to {result['processed_up_to']}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,73 @@
+import hashlib
 import jwt
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 from fastapi import Depends, FastAPI, HTTPException, Security, status
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
 from pydantic import ValidationError
+from app import metrics
+from app.cache import TTLCache
+from app.database import get_db
+from app.hashing import hash_password, hash_passwords_bulk, verify_and_update
 from app.models import TokenData, User
-from dotenv import load_dotenv
 from fastapi.security import (
     OAuth2PasswordBearer,
     SecurityScopes,
 )
+from dotenv import load_dotenv
 
 load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-
-client = AsyncIOMotorClient(MONGO_URI)
-db = client.education_website 
 
 SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# HMAC keys are bytes; encoding once avoids redoing it on every encode/decode.
+_SECRET_KEY_BYTES = SECRET_KEY.encode()
+
+# Each worker keeps its own copy, so a disabled user is rejected by other
+# workers at most USER_CACHE_TTL_SECONDS after the change.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# Verified tokens are cached until their own "exp", so the TTL here is only a
+# fallback for tokens issued without one.
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="token",
-    scopes={"me": "Read information about the current user.", "items": "Read items."},
+    scopes={
+        "me": "Read information about the current user.",
+        "items": "Read items.",
+        "moderate": "Bulk edit and delete posts.",
+    },
 )
 
+# Clients may ask for any scope at login, so moderation also checks the role.
+MODERATOR_ROLES = set(os.getenv("MODERATOR_ROLES", "admin,moderator,teacher").split(","))
+
 app = FastAPI()
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    valid, _ = await verify_and_update(plain_password, hashed_password)
+    return valid
+
+
+async def get_password_hash(password):
+    return await hash_password(password)
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hashes_bulk(passwords):
+    return await hash_passwords_bulk(passwords)
 
 
 async def get_user(db, username: str):
@@ -49,12 +77,28 @@ async def get_user(db, username: str):
         return User(**user)
 
 
+def invalidate_user(user_id: str | None = None, username: str | None = None):
+    if username is not None:
+        user_cache.pop(username)
+    if user_id is not None:
+        user_cache.discard_where(lambda user: user.id == user_id)
+
+
 async def authenticate_user(db, username: str, password: str):
-    user = await get_user(db, username)
+    with metrics.timed("auth_user_lookup"):
+        user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    valid, new_hash = await verify_and_update(password, user.password)
+    if not valid:
         return False
+    if new_hash:
+        # The stored hash uses deprecated settings; upgrade it while we have the plaintext.
+        await db.user.update_one(
+            {"username": username, "password": user.password}, {"$set": {"password": new_hash}}
+        )
+        user.password = new_hash
+        invalidate_user(username=username)
     return user
 
 
@@ -65,12 +109,30 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SECRET_KEY_BYTES, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def decode_token(token: str) -> TokenData | None:
+    key = hashlib.blake2b(token.encode(), digest_size=32).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+    payload = jwt.decode(token, _SECRET_KEY_BYTES, algorithms=[ALGORITHM])
+    username = payload.get("sub")
+    if username is None:
+        return None
+    token_data = TokenData(scopes=payload.get("scopes", []), username=username)
+    exp = payload.get("exp")
+    ttl = exp - time.time() if exp is not None else None
+    token_cache.set(key, token_data, ttl=ttl)
+    return token_data
+
+
 async def get_current_user(
-    security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]
+    security_scopes: SecurityScopes,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_db)],
 ):
     if security_scopes.scopes:
         authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
@@ -82,18 +144,19 @@ async def get_current_user(
         headers={"WWW-Authenticate": authenticate_value},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_scopes = payload.get("scopes", [])
-        print(token_scopes)
-        token_data = TokenData(scopes=token_scopes, username=username)
+        with metrics.timed("auth_jwt"):
+            token_data = decode_token(token)
     except (InvalidTokenError, ValidationError):
         raise credentials_exception
-    user = await get_user(db, username=token_data.username)
-    if user is None:
+    if token_data is None:
         raise credentials_exception
+    user = user_cache.get(token_data.username)
+    if user is None:
+        with metrics.timed("auth_user_lookup"):
+            user = await get_user(db, username=token_data.username)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(token_data.username, user)
     for scope in security_scopes.scopes:
         if scope not in token_data.scopes:
             raise HTTPException(
@@ -112,3 +175,9 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_moderator(
+    current_user: Annotated[User, Security(get_current_active_user, scopes=["moderate"])],
+):
+    if current_user.role not in MODERATOR_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Moderator role required")
+    return current_user
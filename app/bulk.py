@@ -0,0 +1,122 @@
+import os
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+load_dotenv()
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "50000"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def read_items(request: Request) -> list:
+    # Accepts a JSON array or NDJSON (one object per line). NDJSON lines that
+    # fail to parse are kept as exceptions so they are reported per item.
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(orjson.loads(line))
+            except orjson.JSONDecodeError as exc:
+                items.append(exc)
+    else:
+        try:
+            items = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    return items
+
+
+def _item_error(index: int, detail: str) -> dict:
+    return {"index": index, "detail": detail}
+
+
+def validate_chunk(items: list, offset: int, model: type[BaseModel]):
+    valid, errors = [], []
+    for position, item in enumerate(items, start=offset):
+        if isinstance(item, Exception):
+            errors.append(_item_error(position, f"Invalid JSON: {item}"))
+            continue
+        try:
+            valid.append((position, model.model_validate(item)))
+        except ValidationError as exc:
+            errors.append(_item_error(position, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            )))
+    return valid, errors
+
+
+def _write_error_detail(error: dict) -> str:
+    if error.get("code") == 11000:
+        key_pattern = error.get("keyPattern") or {}
+        field = next(iter(key_pattern), "key")
+        return f"Duplicate {field}"
+    return error.get("errmsg", "Write failed")
+
+
+async def insert_chunk(collection, indexed_docs: list[tuple[int, dict]]):
+    # Unordered insert: one bad document does not stop the rest of the chunk.
+    docs = [doc for _, doc in indexed_docs]
+    failed = {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        for error in exc.details.get("writeErrors", []):
+            failed[error["index"]] = _write_error_detail(error)
+    inserted_ids, errors = [], []
+    for chunk_index, (position, doc) in enumerate(indexed_docs):
+        if chunk_index in failed:
+            errors.append(_item_error(position, failed[chunk_index]))
+        else:
+            inserted_ids.append(str(doc["_id"]))
+    return inserted_ids, errors
+
+
+async def bulk_insert(
+    items: list,
+    model: type[BaseModel],
+    collection,
+    prepare,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    after_insert=None,
+):
+    # `prepare` turns a list of validated models into documents (async, so
+    # user chunks can hash their passwords concurrently off the event loop);
+    # it may return a string instead of a document to reject that item.
+    # `after_insert` receives the documents that were written, per chunk.
+    inserted_ids, errors = [], []
+    for offset in range(0, len(items), chunk_size):
+        valid, chunk_errors = validate_chunk(items[offset:offset + chunk_size], offset, model)
+        errors.extend(chunk_errors)
+        if not valid:
+            continue
+        docs = await prepare([item for _, item in valid])
+        indexed_docs = []
+        for (position, _), doc in zip(valid, docs):
+            if isinstance(doc, str):
+                errors.append(_item_error(position, doc))
+                continue
+            doc["_id"] = ObjectId()
+            indexed_docs.append((position, doc))
+        if not indexed_docs:
+            continue
+        chunk_ids, chunk_errors = await insert_chunk(collection, indexed_docs)
+        inserted_ids.extend(chunk_ids)
+        errors.extend(chunk_errors)
+        if after_insert is not None and chunk_ids:
+            written = set(chunk_ids)
+            await after_insert([doc for _, doc in indexed_docs if str(doc["_id"]) in written])
+    errors.sort(key=lambda error: error["index"])
+    return {"inserted_count": len(inserted_ids), "inserted_ids": inserted_ids, "errors": errors}
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# In-process LRU cache whose entries also expire after a time-to-live.
+# `on_evict(key, value)` is called whenever an entry leaves the cache.
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._on_evict = on_evict
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            if self._on_evict:
+                self._on_evict(key, value)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        previous = self._data.get(key)
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        if self._on_evict:
+            if previous is not None:
+                self._on_evict(key, previous[0])
+        while len(self._data) > self.maxsize:
+            evicted_key, (evicted, _) = self._data.popitem(last=False)
+            if self._on_evict:
+                self._on_evict(evicted_key, evicted)
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry and self._on_evict:
+            self._on_evict(key, entry[0])
+        return entry[0] if entry else None
+
+    def discard_where(self, predicate):
+        stale = [key for key, (value, _) in self._data.items() if predicate(value)]
+        for key in stale:
+            self.pop(key)
+
+    def clear(self):
+        if self._on_evict:
+            for key, (value, _) in self._data.items():
+                self._on_evict(key, value)
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Cache for expensive async computations (aggregations). Within `ttl` the value
+# is served as is; for a further `stale_ttl` it is still served while a single
+# background task recomputes it. Concurrent misses share one computation.
+class StaleWhileRevalidateCache:
+    def __init__(self, ttl: float, stale_ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+
+    async def get(self, key, compute):
+        entry = self._data.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            now = time.monotonic()
+            if now < fresh_until:
+                self.hits += 1
+                return value
+            if now < stale_until:
+                self.stale_hits += 1
+                self._refresh(key, compute)
+                return value
+        self.misses += 1
+        # shield: a cancelled request must not cancel the computation others wait on.
+        return await asyncio.shield(self._refresh(key, compute))
+
+    def _refresh(self, key, compute) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, compute))
+            # Background refreshes may fail with nobody awaiting them; retrieve
+            # the exception so it is not reported as never retrieved.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _run(self, key, compute):
+        try:
+            value = await compute()
+            now = time.monotonic()
+            self._data[key] = (value, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._inflight),
+        }
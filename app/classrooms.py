@@ -0,0 +1,225 @@
+import argparse
+import os
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from app import transactions
+from app.bulk import BULK_MAX_ITEMS
+from app.database import get_db
+from app.models import ClassroomProvision, ClassroomProvisionResponse
+from app.projections import USER_SUMMARY_FIELDS, projection
+from app.serialization import trusted_response
+from dotenv import load_dotenv
+
+load_dotenv()
+# "normalized": build the tree with one $lookup pipeline over section,
+# sectionFile, submission, ... on every read.
+# "denormalized": read a prebuilt document from `classroomTree`, which writes
+# refresh through sync_classroom_tree (built on first read if missing).
+CLASSROOM_READ_MODEL = os.getenv("CLASSROOM_READ_MODEL", "normalized")
+
+CLASSROOM_TREE_COLLECTION = "classroomTree"
+
+Database = Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+
+router = APIRouter(prefix="/classrooms", tags=["classrooms"])
+
+
+def _children(collection: str, foreign_field: str, alias: str, pipeline: list | None = None) -> dict:
+    # localField/foreignField together with a sub-pipeline needs MongoDB 5.0+.
+    lookup = {"from": collection, "localField": "_id", "foreignField": foreign_field, "as": alias}
+    if pipeline:
+        lookup["pipeline"] = pipeline
+    return {"$lookup": lookup}
+
+
+def classroom_tree_pipeline(match: dict) -> list:
+    user_summary = {"$project": projection(USER_SUMMARY_FIELDS)}
+    answers = _children("answer", "question_id", "answers")
+    questions = _children("question", "testQuestion_id", "questions", [answers])
+    tests = _children("testQuestion", "submission_id", "tests", [questions])
+    return [
+        {"$match": match},
+        {"$lookup": {"from": "subject", "localField": "subject_id", "foreignField": "_id", "as": "subject"}},
+        {"$lookup": {
+            "from": "user", "localField": "teacher_id", "foreignField": "_id",
+            "pipeline": [user_summary], "as": "teacher",
+        }},
+        _children("participant", "classroom_id", "students", [
+            {"$lookup": {
+                "from": "user", "localField": "user_id", "foreignField": "_id",
+                "pipeline": [user_summary], "as": "user",
+            }},
+            {"$unwind": "$user"},
+            {"$replaceRoot": {"newRoot": "$user"}},
+        ]),
+        _children("section", "classroom_id", "sections", [_children("sectionFile", "section_id", "files")]),
+        _children("submission", "classroom_id", "submissions", [
+            _children("submissionFile", "submission_id", "files"),
+            tests,
+        ]),
+        {"$set": {"subject": {"$first": "$subject"}, "teacher": {"$first": "$teacher"}}},
+    ]
+
+
+async def build_classroom_tree(db, classroom_id: ObjectId) -> dict | None:
+    rows = await db.classroom.aggregate(classroom_tree_pipeline({"_id": classroom_id})).to_list(1)
+    return rows[0] if rows else None
+
+
+async def sync_classroom_tree(db, classroom_ids: list[ObjectId], session=None):
+    # Rebuilds the read-model documents server-side in one round trip; call
+    # after any write that changes a classroom or its children.
+    if CLASSROOM_READ_MODEL != "denormalized" or not classroom_ids:
+        return
+    pipeline = classroom_tree_pipeline({"_id": {"$in": classroom_ids}}) + [
+        {"$merge": {"into": CLASSROOM_TREE_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    await db.classroom.aggregate(pipeline, session=session).to_list(None)
+
+
+async def sync_user_classrooms(db, user_id: ObjectId):
+    # The read model embeds teacher and student summaries, so a user write
+    # refreshes every classroom the user teaches or attends.
+    if CLASSROOM_READ_MODEL != "denormalized":
+        return
+    user_ids = [user_id, str(user_id)]
+    taught = await db.classroom.distinct("_id", {"teacher_id": {"$in": user_ids}})
+    attended = await db.participant.distinct("classroom_id", {"user_id": {"$in": user_ids}})
+    await sync_classroom_tree(db, list({*taught, *attended}))
+
+
+@router.get("/{id}/tree")
+async def get_classroom_tree(id: str, db: Database):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid classroom ID format")
+
+    classroom_id = ObjectId(id)
+    tree = None
+    if CLASSROOM_READ_MODEL == "denormalized":
+        tree = await db[CLASSROOM_TREE_COLLECTION].find_one({"_id": classroom_id})
+        if tree is None:
+            tree = await build_classroom_tree(db, classroom_id)
+            if tree is not None:
+                await db[CLASSROOM_TREE_COLLECTION].replace_one({"_id": classroom_id}, tree, upsert=True)
+    else:
+        tree = await build_classroom_tree(db, classroom_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Classroom not found")
+
+    return trusted_response(tree)
+
+
+# Insert order for provisioning: parents before children.
+PROVISION_COLLECTIONS = (
+    "subject", "classroom", "section", "sectionFile", "submission", "submissionFile",
+    "testQuestion", "question", "answer", "participant",
+)
+
+
+def _object_id(value: str, label: str) -> ObjectId:
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=400, detail=f"Invalid {label} ID format")
+    return ObjectId(value)
+
+
+def provision_documents(body: ClassroomProvision, teacher_id: ObjectId, subject_id: ObjectId,
+                        student_ids: list[ObjectId]) -> dict[str, list[dict]]:
+    # Every document of the classroom with its _id assigned up front, so
+    # children can reference their parents and each collection takes one
+    # insert_many. References are ObjectIds, as the tree pipeline joins on them.
+    docs = {name: [] for name in PROVISION_COLLECTIONS}
+    if body.subject is not None:
+        docs["subject"].append({"_id": subject_id, **body.subject.dict()})
+    classroom_id = ObjectId()
+    docs["classroom"].append({"_id": classroom_id, "name": body.name, "teacher_id": teacher_id, "subject_id": subject_id})
+
+    for section in body.sections:
+        section_id = ObjectId()
+        docs["section"].append({
+            "_id": section_id, "title": section.title, "description": section.description, "classroom_id": classroom_id,
+        })
+        for file in section.files:
+            docs["sectionFile"].append({"_id": ObjectId(), **file.dict(), "section_id": section_id})
+
+    for submission in body.submissions:
+        submission_id = ObjectId()
+        docs["submission"].append({
+            "_id": submission_id, "title": submission.title, "description": submission.description,
+            "classroom_id": classroom_id,
+        })
+        for file in submission.files:
+            docs["submissionFile"].append({"_id": ObjectId(), **file.dict(), "submission_id": submission_id})
+        for test in submission.tests:
+            test_id = ObjectId()
+            docs["testQuestion"].append({"_id": test_id, "title": test.title, "submission_id": submission_id})
+            for question in test.questions:
+                question_id = ObjectId()
+                docs["question"].append({"_id": question_id, "content": question.content, "testQuestion_id": test_id})
+                for answer in question.answers:
+                    docs["answer"].append({"_id": ObjectId(), **answer.dict(), "question_id": question_id})
+
+    for student_id in student_ids:
+        docs["participant"].append({"_id": ObjectId(), "classroom_id": classroom_id, "user_id": student_id})
+    return docs
+
+
+@router.post("/provision", response_model=ClassroomProvisionResponse, status_code=201)
+async def provision_classroom(body: ClassroomProvision, db: Database):
+    if (body.subject_id is None) == (body.subject is None):
+        raise HTTPException(status_code=400, detail="Send either subject_id or subject")
+    teacher_id = _object_id(body.teacher_id, "teacher")
+    subject_id = _object_id(body.subject_id, "subject") if body.subject_id else ObjectId()
+    student_ids = list(dict.fromkeys(_object_id(id, "student") for id in body.student_ids))
+
+    docs = provision_documents(body, teacher_id, subject_id, student_ids)
+    if sum(len(batch) for batch in docs.values()) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} documents per classroom")
+
+    user_ids = [teacher_id, *student_ids]
+
+    async def write(session):
+        # Reads inside the transaction see the same snapshot the inserts commit against.
+        found = set(await db.user.distinct("_id", {"_id": {"$in": user_ids}}, session=session))
+        missing = [str(id) for id in user_ids if id not in found]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown user IDs: {', '.join(missing)}")
+        if body.subject is None and await db.subject.count_documents({"_id": subject_id}, limit=1, session=session) == 0:
+            raise HTTPException(status_code=404, detail="Subject not found")
+        # Operations in one session must not overlap, so the batches go one after another.
+        for name in PROVISION_COLLECTIONS:
+            if docs[name]:
+                await db[name].insert_many(docs[name], session=session)
+
+    await transactions.run_in_transaction(db.client, write)
+
+    classroom_id = docs["classroom"][0]["_id"]
+    # $merge cannot run inside a transaction; the read model follows the commit.
+    await sync_classroom_tree(db, [classroom_id])
+    return {
+        "message": "✅ Classroom provisioned successfully!",
+        "classroom_id": str(classroom_id),
+        "subject_id": str(subject_id),
+        "inserted": {name: len(batch) for name, batch in docs.items() if batch},
+    }
+
+
+def main():
+    from pymongo import MongoClient
+    from app.database import MONGO_DB_NAME, MONGO_URI
+
+    parser = argparse.ArgumentParser(description="Rebuild the denormalized classroomTree read model.")
+    parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    db = client[MONGO_DB_NAME]
+    db.classroom.aggregate(classroom_tree_pipeline({}) + [
+        {"$merge": {"into": CLASSROOM_TREE_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ], allowDiskUse=True)
+    print(f"✅ Rebuilt {db[CLASSROOM_TREE_COLLECTION].estimated_document_count()} classroom trees")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+from collections import Counter
+from datetime import datetime
+from pymongo import UpdateOne
+from app.loader import to_object_id
+
+# forumPost.comment_count / last_comment_at replace the $lookup + $size joins in
+# t1_aggregate_queries.py; the "forum" document in `stats` holds the global
+# totals used for averages. Both are kept current with $inc on every write and
+# can be rebuilt from forumComment with `python -m app.counters`.
+STATS_COLLECTION = "stats"
+FORUM_STATS_ID = "forum"
+
+
+async def add_comments(db, post_counts: Counter, created_at: datetime):
+    if not post_counts:
+        return
+    requests = [
+        UpdateOne(
+            {"_id": post_id},
+            {"$inc": {"comment_count": count}, "$max": {"last_comment_at": created_at}},
+        )
+        for post_id, count in post_counts.items()
+    ]
+    await db.forumPost.bulk_write(requests, ordered=False)
+    await db[STATS_COLLECTION].update_one(
+        {"_id": FORUM_STATS_ID}, {"$inc": {"comments": sum(post_counts.values())}}, upsert=True
+    )
+
+
+async def add_comment(db, post_id, created_at: datetime) -> bool:
+    result = await db.forumPost.update_one(
+        {"_id": post_id},
+        {"$inc": {"comment_count": 1}, "$max": {"last_comment_at": created_at}},
+    )
+    if result.matched_count == 0:
+        return False
+    await db[STATS_COLLECTION].update_one({"_id": FORUM_STATS_ID}, {"$inc": {"comments": 1}}, upsert=True)
+    return True
+
+
+async def remove_comments(db, post_id, count: int = 1):
+    # last_comment_at is left as is; `python -m app.counters` recomputes it.
+    await db.forumPost.update_one({"_id": post_id}, {"$inc": {"comment_count": -count}})
+    await db[STATS_COLLECTION].update_one({"_id": FORUM_STATS_ID}, {"$inc": {"comments": -count}}, upsert=True)
+
+
+async def add_posts(db, count: int):
+    if count:
+        await db[STATS_COLLECTION].update_one({"_id": FORUM_STATS_ID}, {"$inc": {"posts": count}}, upsert=True)
+
+
+async def remove_posts(db, posts: int, comments: int):
+    # For deletes that take the posts' comments with them.
+    if posts or comments:
+        await db[STATS_COLLECTION].update_one(
+            {"_id": FORUM_STATS_ID}, {"$inc": {"posts": -posts, "comments": -comments}}, upsert=True
+        )
+
+
+async def forum_stats(db) -> dict:
+    stats = await db[STATS_COLLECTION].find_one({"_id": FORUM_STATS_ID}) or {}
+    posts = stats.get("posts", 0)
+    comments = stats.get("comments", 0)
+    return {
+        "posts": posts,
+        "comments": comments,
+        "average_comments_per_post": comments / posts if posts else 0.0,
+    }
+
+
+def repair(db, batch_size: int = 1000) -> dict:
+    # Synchronous (PyMongo) backfill: walks forumPost in _id order and
+    # recomputes each batch's counters with one grouped query on forumComment.
+    posts = 0
+    comments = 0
+    last_id = None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = [post["_id"] for post in db.forumPost.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not batch:
+            break
+        keys = batch + [str(post_id) for post_id in batch]
+        grouped = {}
+        for row in db.forumComment.aggregate([
+            {"$match": {"forumPost_id": {"$in": keys}}},
+            {"$group": {"_id": "$forumPost_id", "count": {"$sum": 1}, "last": {"$max": "$created_at"}}},
+        ]):
+            post_id = to_object_id(row["_id"])
+            count, last = grouped.get(post_id, (0, None))
+            latest = max((value for value in (last, row["last"]) if value is not None), default=None)
+            grouped[post_id] = (count + row["count"], latest)
+        requests = []
+        for post_id in batch:
+            count, last = grouped.get(post_id, (0, None))
+            requests.append(UpdateOne({"_id": post_id}, {"$set": {"comment_count": count, "last_comment_at": last}}))
+            comments += count
+        db.forumPost.bulk_write(requests, ordered=False)
+        posts += len(batch)
+        last_id = batch[-1]
+    db[STATS_COLLECTION].update_one(
+        {"_id": FORUM_STATS_ID}, {"$set": {"posts": posts, "comments": comments}}, upsert=True
+    )
+    return {"posts": posts, "comments": comments}
+
+
+def main():
+    from pymongo import MongoClient
+    from app.database import MONGO_DB_NAME, MONGO_URI
+
+    parser = argparse.ArgumentParser(description="Recompute forumPost comment counters and forum stats.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    result = repair(client[MONGO_DB_NAME], batch_size=args.batch_size)
+    print(f"✅ Recomputed counters for {result['posts']} posts ({result['comments']} comments)")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
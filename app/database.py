@@ -0,0 +1,67 @@
+import asyncio
+import importlib.util
+import os
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from app import metrics, query_monitor
+from dotenv import load_dotenv
+
+load_dotenv()
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "education_website")
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+MONGO_PREWARM = os.getenv("MONGO_PREWARM", "1") == "1"
+
+
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy"}
+
+
+def available_compressors(compressors: str) -> list[str]:
+    # zstd and snappy need optional packages; skip them quietly when missing
+    # instead of letting PyMongo warn on every startup.
+    names = [name.strip() for name in compressors.split(",") if name.strip()]
+    return [
+        name for name in names
+        if name not in _COMPRESSOR_MODULES or importlib.util.find_spec(_COMPRESSOR_MODULES[name])
+    ]
+
+
+def create_client() -> AsyncIOMotorClient:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    compressors = available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = compressors
+    listeners = []
+    if metrics.METRICS_ENABLED:
+        listeners.append(metrics.command_timer)
+    if query_monitor.QUERY_MONITOR_ENABLED:
+        listeners.append(query_monitor.monitor)
+    if listeners:
+        options["event_listeners"] = listeners
+    client = AsyncIOMotorClient(MONGO_URI, **options)
+    # Explains for slow query shapes run on the underlying PyMongo client.
+    query_monitor.monitor.client = client.delegate
+    return client
+
+
+async def prewarm_pool(client: AsyncIOMotorClient):
+    # Concurrent pings each check out their own socket, so the pool holds at
+    # least minPoolSize open connections before the first request arrives.
+    db = client[MONGO_DB_NAME]
+    await asyncio.gather(*(db.command("ping") for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
+
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return request.app.state.db
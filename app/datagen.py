@@ -0,0 +1,249 @@
+import random
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from app.search import normalize_title
+
+# Synthetic, referentially consistent data for the collections in app/models.py.
+# The user pool and every classroom draw from their own random.Random derived
+# from the seed, so the same seed and scale always produce the same dataset,
+# whichever classrooms are generated and in whatever order or process. Sizes are skewed the way real usage
+# is: a few big classrooms, a few prolific posters, a few hot threads.
+
+# Password hashing is far too slow for bulk data; every generated user shares
+# this bcrypt hash of "password".
+SEED_PASSWORD_HASH = "$2b$12$ye4XhHrTgM1ndQ0GAPtjeuWnzT7Rc4oXA.r/XI0uuTtmtH3HZyIkK"
+
+POST_TYPES = ["discuss", "question", "announcement"]
+WORDS = (
+    "algebra chemistry physics biology history essay exam quiz homework lab "
+    "reaction equation energy motion cell theory proof graph function atom "
+    "question answer review notes deadline project group reading chapter"
+).split()
+
+
+class Scale:
+    def __init__(
+        self,
+        classrooms: int = 100,
+        students: int = 3000,
+        teachers: int | None = None,
+        students_per_classroom: int = 30,
+        sections: int = 6,
+        files_per_section: int = 2,
+        submissions: int = 4,
+        tests_per_submission: int = 1,
+        questions_per_test: int = 5,
+        answers_per_question: int = 4,
+        posts_per_classroom: int = 20,
+        comments_per_post: int = 5,
+    ):
+        self.classrooms = classrooms
+        self.students = students
+        self.teachers = teachers or max(1, classrooms // 3)
+        self.students_per_classroom = students_per_classroom
+        self.sections = sections
+        self.files_per_section = files_per_section
+        self.submissions = submissions
+        self.tests_per_submission = tests_per_submission
+        self.questions_per_test = questions_per_test
+        self.answers_per_question = answers_per_question
+        self.posts_per_classroom = posts_per_classroom
+        self.comments_per_post = comments_per_post
+
+
+def _skewed(rng: random.Random, mean: int, alpha: float = 2.0) -> int:
+    # Pareto-distributed count with the requested mean (heavy right tail).
+    if mean <= 0:
+        return 0
+    scale = mean * (alpha - 1) / alpha
+    return max(0, int(scale * rng.paretovariate(alpha)))
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _oid(rng: random.Random, when: datetime) -> ObjectId:
+    # Deterministic ObjectIds: timestamp from the generated clock, rest from the seed.
+    return ObjectId(int(when.timestamp()).to_bytes(4, "big") + rng.randbytes(8))
+
+
+class Generator:
+    def __init__(self, scale: Scale, seed: int = 42, start: datetime | None = None):
+        self.scale = scale
+        self.seed = seed
+        self.start = start or datetime(2024, 9, 1, tzinfo=timezone.utc)
+        self.subjects = []
+        self.teachers = []
+        self.students = []
+
+    def _user(self, rng: random.Random, index: int, role: str) -> dict:
+        return {
+            "_id": _oid(rng, self.start - timedelta(days=30) + timedelta(seconds=index)),
+            "username": f"{role}_{index}",
+            "email": f"{role}.{index}@example.com",
+            "password": SEED_PASSWORD_HASH,
+            "role": role,
+            "disabled": False,
+        }
+
+    def users(self) -> dict[str, list[dict]]:
+        # Generated up front: every classroom references this pool.
+        rng = random.Random(self.seed)
+        self.subjects = [
+            {"_id": _oid(rng, self.start), "name": name.title(), "description": f"{name.title()} course"}
+            for name in ("mathematics", "physics", "chemistry", "biology", "history", "literature")
+        ]
+        self.teachers = [self._user(rng, i, "teacher") for i in range(self.scale.teachers)]
+        self.students = [self._user(rng, i, "student") for i in range(self.scale.students)]
+        return {"subject": self.subjects, "user": self.teachers + self.students}
+
+    def classroom(self, index: int) -> dict[str, list[dict]]:
+        # One classroom and every document that hangs off it, in normalized form.
+        # Needs users() to have been called on this generator first.
+        rng = random.Random(f"{self.seed}:{index}")
+        scale = self.scale
+        clock = self.start + timedelta(hours=index)
+
+        def tick(seconds: float) -> datetime:
+            nonlocal clock
+            clock += timedelta(seconds=rng.expovariate(1 / seconds))
+            return clock
+
+        docs = {name: [] for name in (
+            "classroom", "participant", "section", "sectionFile", "submission", "submissionFile",
+            "testQuestion", "question", "answer", "forumPost", "forumComment",
+        )}
+        created = tick(3600)
+        classroom_id = _oid(rng, created)
+        teacher = rng.choice(self.teachers)
+        docs["classroom"].append({
+            "_id": classroom_id,
+            "name": f"Class {index}",
+            "teacher_id": teacher["_id"],
+            "subject_id": rng.choice(self.subjects)["_id"],
+        })
+
+        size = min(len(self.students), max(1, _skewed(rng, scale.students_per_classroom)))
+        members = rng.sample(self.students, size)
+        for student in members:
+            docs["participant"].append({"_id": _oid(rng, created), "classroom_id": classroom_id, "user_id": student["_id"]})
+
+        for s in range(scale.sections):
+            section_id = _oid(rng, created)
+            docs["section"].append({
+                "_id": section_id, "title": f"Section {s + 1}: {_text(rng, 3)}",
+                "description": _text(rng, 12), "classroom_id": classroom_id,
+            })
+            for f in range(scale.files_per_section):
+                docs["sectionFile"].append({
+                    "_id": _oid(rng, created), "file_name": f"section_{s + 1}_{f + 1}.pdf",
+                    "file_url": f"https://example.com/{classroom_id}/section_{s + 1}_{f + 1}.pdf",
+                    "section_id": section_id,
+                })
+
+        for s in range(scale.submissions):
+            submission_id = _oid(rng, created)
+            docs["submission"].append({
+                "_id": submission_id, "title": f"Assignment {s + 1}",
+                "description": _text(rng, 15), "classroom_id": classroom_id,
+            })
+            docs["submissionFile"].append({
+                "_id": _oid(rng, created), "file_name": f"assignment_{s + 1}.pdf",
+                "file_url": f"https://example.com/{classroom_id}/assignment_{s + 1}.pdf",
+                "submission_id": submission_id,
+            })
+            for t in range(scale.tests_per_submission):
+                test_id = _oid(rng, created)
+                docs["testQuestion"].append({"_id": test_id, "title": f"Test {s + 1}.{t + 1}", "submission_id": submission_id})
+                for _ in range(scale.questions_per_test):
+                    question_id = _oid(rng, created)
+                    docs["question"].append({"_id": question_id, "content": _text(rng, 10) + "?", "testQuestion_id": test_id})
+                    correct = rng.randrange(scale.answers_per_question) if scale.answers_per_question else -1
+                    for a in range(scale.answers_per_question):
+                        docs["answer"].append({
+                            "_id": _oid(rng, created), "content": _text(rng, 4),
+                            "is_correct": a == correct, "question_id": question_id,
+                        })
+
+        # A few members write most posts; a few posts get most comments.
+        weights = [rng.paretovariate(1.2) for _ in members]
+        for _ in range(_skewed(rng, scale.posts_per_classroom)):
+            posted = tick(600)
+            author = rng.choices(members, weights)[0]
+            title = _text(rng, 5).capitalize()
+            post_id = _oid(rng, posted)
+            comments = []
+            for _ in range(_skewed(rng, scale.comments_per_post, alpha=1.5)):
+                commented = posted + timedelta(minutes=rng.expovariate(1 / 240))
+                comments.append({
+                    "_id": _oid(rng, commented), "content": _text(rng, 12), "forumPost_id": post_id,
+                    "user_id": rng.choices(members, weights)[0]["_id"], "created_at": commented,
+                })
+            docs["forumPost"].append({
+                "_id": post_id, "user_id": author["_id"], "title": title, "title_lower": normalize_title(title),
+                "content": _text(rng, 40), "type": rng.choice(POST_TYPES), "created_at": posted,
+                "comment_count": len(comments),
+                "last_comment_at": max((c["created_at"] for c in comments), default=None),
+            })
+            docs["forumComment"].extend(comments)
+        return docs
+
+
+def _by(docs: list[dict], field: str) -> dict:
+    grouped = {}
+    for doc in docs:
+        grouped.setdefault(doc[field], []).append(doc)
+    return grouped
+
+
+def _strip(doc: dict, *fields: str) -> dict:
+    return {key: value for key, value in doc.items() if key not in fields}
+
+
+def denormalize(docs: dict[str, list[dict]], users: dict, subjects: dict) -> dict:
+    # The embedded shape of t1_insert_data_denormalized.py, built from one
+    # classroom's normalized documents.
+    classroom = docs["classroom"][0]
+    files = _by(docs["sectionFile"], "section_id")
+    submission_files = _by(docs["submissionFile"], "submission_id")
+    tests = _by(docs["testQuestion"], "submission_id")
+    questions = _by(docs["question"], "testQuestion_id")
+    answers = _by(docs["answer"], "question_id")
+    comments = _by(docs["forumComment"], "forumPost_id")
+    user_summary = lambda user_id: _strip(users[user_id], "password")
+    return {
+        "_id": classroom["_id"],
+        "name": classroom["name"],
+        "subject": _strip(subjects[classroom["subject_id"]], "_id"),
+        "teacher": user_summary(classroom["teacher_id"]),
+        "students": [user_summary(p["user_id"]) for p in docs["participant"]],
+        "sections": [
+            {**_strip(s, "classroom_id"), "files": [_strip(f, "section_id") for f in files.get(s["_id"], [])]}
+            for s in docs["section"]
+        ],
+        "submissions": [
+            {
+                **_strip(s, "classroom_id"),
+                "files": [_strip(f, "submission_id") for f in submission_files.get(s["_id"], [])],
+                "tests": [
+                    {
+                        **_strip(t, "submission_id"),
+                        "questions": [
+                            {
+                                **_strip(q, "testQuestion_id"),
+                                "answers": [_strip(a, "question_id") for a in answers.get(q["_id"], [])],
+                            }
+                            for q in questions.get(t["_id"], [])
+                        ],
+                    }
+                    for t in tests.get(s["_id"], [])
+                ],
+            }
+            for s in docs["submission"]
+        ],
+        "forum_posts": [
+            {**_strip(p, "title_lower"), "comments": [_strip(c, "forumPost_id") for c in comments.get(p["_id"], [])]}
+            for p in docs["forumPost"]
+        ],
+    }
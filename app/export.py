@@ -0,0 +1,61 @@
+import csv
+import io
+import os
+from fastapi.responses import StreamingResponse
+from app.serialization import bson_default, dumps
+from dotenv import load_dotenv
+
+load_dotenv()
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+async def _ndjson_rows(cursor, batch_size: int):
+    # One write per batch keeps the number of ASGI sends low while holding at
+    # most one batch of encoded rows in memory.
+    buffer = []
+    async for doc in cursor:
+        buffer.append(dumps(doc))
+        if len(buffer) >= batch_size:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if buffer:
+        yield b"\n".join(buffer) + b"\n"
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    try:
+        return bson_default(value)
+    except TypeError:
+        return str(value)
+
+
+async def _csv_rows(cursor, fields: list[str], batch_size: int):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    rows = 0
+    async for doc in cursor:
+        writer.writerow([_csv_value(doc.get(field)) for field in fields])
+        rows += 1
+        if rows % batch_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def stream_export(cursor, fields: list[str], export_format: str, filename: str, batch_size: int = EXPORT_BATCH_SIZE):
+    cursor = cursor.batch_size(batch_size)
+    if export_format == "csv":
+        return StreamingResponse(
+            _csv_rows(cursor, fields, batch_size),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+    return StreamingResponse(_ndjson_rows(cursor, batch_size), media_type="application/x-ndjson")
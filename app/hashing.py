@@ -0,0 +1,131 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from passlib.context import CryptContext
+from app import metrics
+from dotenv import load_dotenv
+
+load_dotenv()
+# "thread" keeps bcrypt in this process (the C extension releases the GIL);
+# "process" moves it to worker processes when the GIL is still a bottleneck.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 2)))
+# Slots bulk imports may hold at once, across all requests; the rest stay free
+# for interactive logins and sign-ups.
+PASSWORD_HASH_BULK_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASH_BULK_CONCURRENCY", str(max(1, PASSWORD_HASH_MAX_CONCURRENCY // 2)))
+)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HashExecutor:
+    def __init__(self, mode: str, workers: int, max_concurrency: int, bulk_concurrency: int):
+        self.mode = mode
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.bulk_concurrency = min(bulk_concurrency, max_concurrency)
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._bulk_semaphore: asyncio.Semaphore | None = None
+        self.waiting = 0
+        self.bulk_waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.wait_seconds += started_at - queued_at
+        metrics.record("bcrypt_wait", started_at - queued_at)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            elapsed = time.perf_counter() - started_at
+            self.run_seconds += elapsed
+            metrics.record("bcrypt", elapsed)
+            self._semaphore.release()
+
+    async def run_bulk(self, func, *args):
+        # Bulk jobs queue here first, so at most bulk_concurrency of them ever
+        # wait on (or hold) the shared slots ahead of interactive requests.
+        if self._bulk_semaphore is None:
+            self._bulk_semaphore = asyncio.Semaphore(self.bulk_concurrency)
+        self.bulk_waiting += 1
+        try:
+            await self._bulk_semaphore.acquire()
+        finally:
+            self.bulk_waiting -= 1
+        try:
+            return await self.run(func, *args)
+        finally:
+            self._bulk_semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "bulk_concurrency": self.bulk_concurrency,
+            "waiting": self.waiting,
+            "bulk_waiting": self.bulk_waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "wait_seconds": self.wait_seconds,
+            "run_seconds": self.run_seconds,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_executor = HashExecutor(
+    PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_CONCURRENCY, PASSWORD_HASH_BULK_CONCURRENCY
+)
+
+
+async def hash_password(password: str) -> str:
+    return await hash_executor.run(_hash, password)
+
+
+async def hash_passwords_bulk(passwords: list[str]) -> list[str]:
+    return await asyncio.gather(*(hash_executor.run_bulk(_hash, password) for password in passwords))
+
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await hash_executor.run(_verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,195 @@
+import argparse
+import logging
+import os
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from app import models
+from app.search import TEXT_INDEX, TEXT_INDEX_WEIGHTS, TITLE_KEY_FIELD
+from dotenv import load_dotenv
+
+load_dotenv()
+# "off", "warn" (log missing/drifted indexes) or "create" (also build missing ones).
+INDEX_CHECK_ON_STARTUP = os.getenv("INDEX_CHECK_ON_STARTUP", "warn")
+
+logger = logging.getLogger(__name__)
+
+# Collection name -> model, using the names the app and scripts actually read and write.
+COLLECTIONS = {
+    "user": models.User,
+    "classroom": models.Classroom,
+    "subject": models.Subject,
+    "section": models.Section,
+    "sectionFile": models.SectionFile,
+    "submission": models.Submission,
+    "submissionFile": models.SubmissionFile,
+    "participant": models.Participant,
+    "testQuestion": models.TestQuestion,
+    "question": models.Question,
+    "answer": models.Answer,
+    "forumPost": models.ForumPost,
+    "forumComment": models.ForumComment,
+}
+
+# Indexes the API cannot work correctly without: email/username uniqueness is
+# enforced only by these, and `q=` search needs the text index. They are
+# ensured on every startup, whatever INDEX_CHECK_ON_STARTUP says.
+REQUIRED_INDEXES = {
+    "user": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+    ],
+    "forumPost": [
+        IndexModel(TEXT_INDEX, weights=TEXT_INDEX_WEIGHTS, name="forumPost_text"),
+    ],
+}
+
+# Indexes for the queries the API runs, on top of the per-reference ones below.
+QUERY_INDEXES = {
+    "user": REQUIRED_INDEXES["user"],
+    "participant": [
+        IndexModel([("classroom_id", ASCENDING), ("user_id", ASCENDING)]),
+    ],
+    "forumPost": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("title", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("comment_count", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([(TITLE_KEY_FIELD, ASCENDING)]),
+        *REQUIRED_INDEXES["forumPost"],
+    ],
+}
+
+
+def _reference_fields(model) -> list[str]:
+    return [name for name in model.model_fields if name.endswith("_id")]
+
+
+def build_manifest() -> dict[str, list[IndexModel]]:
+    # Every `*_id` reference field gets an index unless a query index already
+    # starts with it (a compound index serves lookups on its prefix).
+    manifest = {}
+    for collection, model in COLLECTIONS.items():
+        indexes = list(QUERY_INDEXES.get(collection, []))
+        prefixes = {next(iter(index.document["key"])) for index in indexes}
+        for field in _reference_fields(model):
+            if field not in prefixes:
+                indexes.append(IndexModel([(field, ASCENDING)]))
+        if indexes:
+            manifest[collection] = indexes
+    return manifest
+
+
+MANIFEST = build_manifest()
+
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _signature(spec: dict):
+    key = spec["key"]
+    if "_fts" in key or "text" in key.values():
+        # Text indexes are stored as {_fts, _ftsx}; identify them by their weights.
+        return ("text", tuple(sorted(spec.get("weights", {}).items())))
+    return tuple(
+        (field, direction if isinstance(direction, str) else int(direction)) for field, direction in key.items()
+    )
+
+
+def _options(spec: dict) -> dict:
+    return {option: spec[option] for option in _COMPARED_OPTIONS if spec.get(option)}
+
+
+def diff_indexes(existing: list[dict], wanted: list[IndexModel]):
+    existing_by_signature = {_signature(spec): spec for spec in existing if spec["name"] != "_id_"}
+    missing, drifted = [], []
+    for index in wanted:
+        spec = existing_by_signature.pop(_signature(index.document), None)
+        if spec is None:
+            missing.append(index)
+        elif _options(spec) != _options(index.document):
+            drifted.append((index, spec))
+    unmanaged = list(existing_by_signature.values())
+    return missing, drifted, unmanaged
+
+
+def _index_stats(collection) -> dict[str, int]:
+    try:
+        return {stat["name"]: stat["accesses"]["ops"] for stat in collection.aggregate([{"$indexStats": {}}])}
+    except Exception:
+        return {}
+
+
+def reconcile(db, apply: bool = False) -> dict:
+    # Synchronous (PyMongo) reconcile used by the command line and scripts.
+    report = {}
+    for collection_name, wanted in MANIFEST.items():
+        collection = db[collection_name]
+        existing = list(collection.list_indexes())
+        missing, drifted, unmanaged = diff_indexes(existing, wanted)
+        if apply and missing:
+            collection.create_indexes(missing)
+        stats = _index_stats(collection)
+        report[collection_name] = {
+            "missing": [index.document["name"] for index in missing],
+            "created": apply and bool(missing),
+            "drifted": [spec["name"] for _, spec in drifted],
+            "unmanaged": [spec["name"] for spec in unmanaged],
+            "unused": sorted(name for name, ops in stats.items() if ops == 0 and name != "_id_"),
+        }
+    return report
+
+
+async def ensure_required_indexes(db):
+    # create_indexes is a no-op for indexes that already exist. A failure
+    # (e.g. duplicate emails already stored) stops startup rather than letting
+    # the API accept more duplicates.
+    for collection_name, wanted in REQUIRED_INDEXES.items():
+        try:
+            await db[collection_name].create_indexes(wanted)
+        except OperationFailure as exc:
+            raise RuntimeError(f"Could not create required indexes on {collection_name}: {exc}") from exc
+
+
+async def check_indexes(db, create: bool = False):
+    # Async (Motor) startup check: logs differences and optionally builds missing indexes.
+    for collection_name, wanted in MANIFEST.items():
+        collection = db[collection_name]
+        existing = await collection.list_indexes().to_list(None)
+        missing, drifted, _ = diff_indexes(existing, wanted)
+        if missing:
+            names = [index.document["name"] for index in missing]
+            if create:
+                try:
+                    await collection.create_indexes(missing)
+                    logger.info("Created indexes on %s: %s", collection_name, names)
+                except OperationFailure as exc:
+                    # e.g. a unique index over data that already has duplicates.
+                    logger.error("Could not create indexes on %s: %s", collection_name, exc)
+            else:
+                logger.warning("Missing indexes on %s: %s", collection_name, names)
+        for index, spec in drifted:
+            logger.warning(
+                "Index %s on %s differs from the manifest (%s)", spec["name"], collection_name, index.document
+            )
+
+
+def main():
+    from pymongo import MongoClient
+    from app.database import MONGO_DB_NAME, MONGO_URI
+
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with the manifest.")
+    parser.add_argument("--apply", action="store_true", help="create missing indexes")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    report = reconcile(client[MONGO_DB_NAME], apply=args.apply)
+    for collection_name, result in report.items():
+        print(f"{collection_name}:")
+        for key, value in result.items():
+            if value:
+                print(f"  {key}: {value}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+from bson import ObjectId
+from fastapi import Request
+from app.database import get_db
+from app.projections import USER_SUMMARY_FIELDS, projection
+
+
+def to_object_id(value):
+    # References are stored as strings by the API and as ObjectIds by the seed scripts.
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+# Batches every load() made in the same event-loop tick into a single
+# {"_id": {"$in": [...]}} query and remembers results for the rest of the request.
+class DataLoader:
+    def __init__(self, collection, fields: dict | None = None):
+        self.collection = collection
+        self.fields = fields
+        self.queries = 0
+        self._cache: dict = {}
+        self._queue: list = []
+
+    def load(self, key) -> asyncio.Future:
+        key = to_object_id(key)
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._cache[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return future
+
+    async def load_many(self, keys) -> list:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.queries += 1
+        try:
+            docs = await self.collection.find({"_id": {"$in": keys}}, self.fields).to_list(None)
+        except Exception as exc:
+            for key in keys:
+                self._cache.pop(key).set_exception(exc)
+            return
+        by_id = {doc["_id"]: doc for doc in docs}
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(by_id.get(key))
+
+
+class Loaders:
+    def __init__(self, db):
+        self.user = DataLoader(db.user, projection(USER_SUMMARY_FIELDS))
+        self.classroom = DataLoader(db.classroom)
+        self.post = DataLoader(db.forumPost, projection(["_id", "user_id", "title", "type", "created_at"]))
+
+
+def get_loaders(request: Request) -> Loaders:
+    # One set of loaders per request, so cached results never outlive it.
+    loaders = getattr(request.state, "loaders", None)
+    if loaders is None:
+        loaders = request.state.loaders = Loaders(get_db(request))
+    return loaders
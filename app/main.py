@@ -1,11 +1,49 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app import auth, database, hashing, indexes, metrics, query_monitor, response_cache
+from app.analytics import result_cache, router as analytics_router
+from app.classrooms import router as classrooms_router
 from app.routes import router
+from app.serialization import BSONResponse
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    client = database.create_client()
+    app.state.mongo_client = client
+    app.state.db = client[database.MONGO_DB_NAME]
+    if database.MONGO_PREWARM:
+        await database.prewarm_pool(client)
+    await indexes.ensure_required_indexes(app.state.db)
+    if indexes.INDEX_CHECK_ON_STARTUP in ("warn", "create"):
+        await indexes.check_indexes(app.state.db, create=indexes.INDEX_CHECK_ON_STARTUP == "create")
+    yield
+    query_monitor.monitor.shutdown()
+    client.close()
+    hashing.hash_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=BSONResponse)
 
 app.include_router(router)
+app.include_router(analytics_router)
+app.include_router(classrooms_router)
+
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(metrics.router)
+    metrics.registry.collectors.update({
+        "password_hash": hashing.hash_executor.stats,
+        "user_cache": auth.user_cache.stats,
+        "token_cache": auth.token_cache.stats,
+        "analytics_cache": result_cache.stats,
+        "response_cache": response_cache.backend.stats,
+    })
+
+if query_monitor.QUERY_MONITOR_ENABLED and query_monitor.QUERY_MONITOR_ROUTES:
+    app.include_router(query_monitor.router)
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(app, host="127.0.0.1", port=8000, reload=True)
@@ -0,0 +1,211 @@
+import contextvars
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from pymongo import monitoring
+from dotenv import load_dotenv
+
+load_dotenv()
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Where a request's time went. Phases can overlap: "db" also counts the
+# user lookup inside "auth_user_lookup". "bcrypt_wait" is time queued
+# behind other requests' hashes for a free hashing slot.
+PHASES = ("auth_jwt", "auth_user_lookup", "bcrypt_wait", "bcrypt", "db", "serialization")
+_PHASE_INDEX = {phase: index for index, phase in enumerate(PHASES)}
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Per-request phase totals, set by MetricsMiddleware. Motor copies the context
+# into its executor threads, so the command listener sees it too.
+_request_phases = contextvars.ContextVar("request_phases", default=None)
+
+
+def record(phase: str, seconds: float):
+    timings = _request_phases.get()
+    if timings is not None:
+        timings[_PHASE_INDEX[phase]] += seconds
+
+
+@contextmanager
+def timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str, lines: list):
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {_number(self.sum)}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+
+
+class RouteMetrics:
+    # Label text is built once per route, never per request.
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.phases = [Histogram(LATENCY_BUCKETS) for _ in PHASES]
+        self.statuses: dict[int, int] = {}
+
+    def observe(self, status: int, seconds: float, size: int, timings: list):
+        self.latency.observe(seconds)
+        self.size.observe(size)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for histogram, spent in zip(self.phases, timings):
+            if spent:
+                histogram.observe(spent)
+
+
+class Registry:
+    def __init__(self):
+        self.routes: dict[tuple, RouteMetrics] = {}
+        self.in_flight = 0
+        # name -> callable returning a flat dict of numbers (cache and executor stats)
+        self.collectors: dict = {}
+
+    def route(self, method: str, path: str) -> RouteMetrics:
+        metrics = self.routes.get((method, path))
+        if metrics is None:
+            metrics = self.routes[(method, path)] = RouteMetrics(method, path)
+        return metrics
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Responses by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        routes = list(self.routes.values())
+        for metrics in routes:
+            for status, count in list(metrics.statuses.items()):
+                lines.append(f'http_requests_total{{{metrics.labels},status="{status}"}} {count}')
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for metrics in routes:
+            metrics.latency.render("http_request_duration_seconds", metrics.labels, lines)
+        lines += [
+            "# HELP http_response_size_bytes Response body size by route.",
+            "# TYPE http_response_size_bytes histogram",
+        ]
+        for metrics in routes:
+            metrics.size.render("http_response_size_bytes", metrics.labels, lines)
+        lines += [
+            "# HELP http_request_phase_seconds Time per request spent in auth, bcrypt, MongoDB and serialization.",
+            "# TYPE http_request_phase_seconds histogram",
+        ]
+        for metrics in routes:
+            for phase, histogram in zip(PHASES, metrics.phases):
+                if histogram.count:
+                    histogram.render("http_request_phase_seconds", f'{metrics.labels},phase="{phase}"', lines)
+        for name, collect in self.collectors.items():
+            for key, value in collect().items():
+                if isinstance(value, (bool, int, float)):
+                    metric = f"app_{name}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {_number(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no Request object or extra task per request.
+    def __init__(self, app, registry: Registry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        timings = [0.0] * len(PHASES)
+        token = _request_phases.set(timings)
+        self.registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.registry.in_flight -= 1
+            _request_phases.reset(token)
+            # The router stores the matched route in the scope; its path is the
+            # template ("/posts/{id}"), so ids never become label values.
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            self.registry.route(scope["method"], path).observe(status, elapsed, size, timings)
+
+
+class CommandTimer(monitoring.CommandListener):
+    # Adds each MongoDB command's round trip to the current request's "db" phase.
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record("db", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record("db", event.duration_micros / 1e6)
+
+
+command_timer = CommandTimer()
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
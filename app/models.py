@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field, EmailStr
 from typing import Optional
 
@@ -115,9 +116,146 @@ class ForumComment(BaseModel):
 
     class Config:
         populate_by_name = True
+# Partial updates for PATCH: only the fields sent are applied, unknown ones are rejected.
+class UserUpdate(BaseModel):
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    password: Optional[str] = None
+    role: Optional[str] = None
+    disabled: Optional[bool] = None
+
+    class Config:
+        extra = "forbid"
+
+class ForumPostUpdate(BaseModel):
+    title: Optional[str] = None
+    content: Optional[str] = None
+    type: Optional[str] = None
+    # Moderation: hidden posts are left out of GET /posts/ and exports.
+    hidden: Optional[bool] = None
+
+    class Config:
+        extra = "forbid"
+
+# Read models for sparse-fieldset responses: every field may be left out by `fields=`.
+class UserOut(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    username: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+    disabled: Optional[bool] = None
+    version: Optional[int] = None
+
+    class Config:
+        populate_by_name = True
+
+class ForumPostOut(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    user_id: Optional[str] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    type: Optional[str] = None
+    created_at: Optional[datetime] = None
+    comment_count: Optional[int] = None
+    last_comment_at: Optional[datetime] = None
+    version: Optional[int] = None
+    hidden: Optional[bool] = None
+    user: Optional[UserOut] = None
+
+    class Config:
+        populate_by_name = True
+
+# Moderation: select posts by explicit ids or by a filter, optionally as a dry run.
+class PostFilter(BaseModel):
+    user_id: Optional[str] = None
+    type: Optional[str] = None
+
+    class Config:
+        extra = "forbid"
+
+class BulkPostSelection(BaseModel):
+    ids: Optional[list[str]] = None
+    filter: Optional[PostFilter] = None
+    dry_run: bool = False
+
+class BulkPostUpdate(BulkPostSelection):
+    update: ForumPostUpdate
+
+class BulkItemResult(BaseModel):
+    id: str
+    status: str
+
+class BulkModerationResponse(BaseModel):
+    dry_run: bool
+    matched_count: int
+    modified_count: int = 0
+    deleted_count: int = 0
+    comments_deleted: int = 0
+    results: list[BulkItemResult]
+
+# Provisioning: a classroom with its subject, content and students in one request.
+class ProvisionFile(BaseModel):
+    file_name: str
+    file_url: str
+
+class ProvisionSection(BaseModel):
+    title: str
+    description: str
+    files: list[ProvisionFile] = []
+
+class ProvisionAnswer(BaseModel):
+    content: str
+    is_correct: bool
+
+class ProvisionQuestion(BaseModel):
+    content: str
+    answers: list[ProvisionAnswer] = []
+
+class ProvisionTest(BaseModel):
+    title: str
+    questions: list[ProvisionQuestion] = []
+
+class ProvisionSubmission(BaseModel):
+    title: str
+    description: str
+    files: list[ProvisionFile] = []
+    tests: list[ProvisionTest] = []
+
+class ProvisionSubject(BaseModel):
+    name: str
+    description: Optional[str] = None
+
+class ClassroomProvision(BaseModel):
+    name: str
+    teacher_id: str
+    # An existing subject_id, or a new subject to create with the classroom.
+    subject_id: Optional[str] = None
+    subject: Optional[ProvisionSubject] = None
+    sections: list[ProvisionSection] = []
+    submissions: list[ProvisionSubmission] = []
+    student_ids: list[str] = []
+
+class ClassroomProvisionResponse(BaseModel):
+    message: str
+    classroom_id: str
+    subject_id: str
+    inserted: dict[str, int]
+
 class ResponseMessage(BaseModel):
     message: str
 
+class CreatedResponse(ResponseMessage):
+    id: str
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: str
+
+class BulkResponse(BaseModel):
+    inserted_count: int
+    inserted_ids: list[str]
+    errors: list[BulkItemError]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,130 @@
+from bson import ObjectId
+from fastapi import HTTPException
+from app import counters, response_cache
+from app.bulk import BULK_MAX_ITEMS
+from app.models import BulkPostSelection
+
+# Bulk PATCH/DELETE of posts for moderators. Posts are processed in chunks:
+# one find per chunk to learn which ids exist (and their current values), then
+# one update_many / delete_many per chunk, with the chunk's comments removed in
+# the same pass.
+
+
+def _filter_query(selection: BulkPostSelection) -> dict:
+    post_filter = selection.filter
+    if not (post_filter.user_id or post_filter.type):
+        raise HTTPException(status_code=400, detail="Filter needs user_id or type")
+    query = {}
+    if post_filter.user_id:
+        if not ObjectId.is_valid(post_filter.user_id):
+            raise HTTPException(status_code=400, detail="Invalid user ID format")
+        # Posts created through the API store user_id as a string, the seed
+        # scripts as an ObjectId; match both.
+        query["user_id"] = {"$in": [post_filter.user_id, ObjectId(post_filter.user_id)]}
+    if post_filter.type:
+        query["type"] = post_filter.type
+    return query
+
+
+def _requested_ids(selection: BulkPostSelection) -> tuple[list[ObjectId], dict]:
+    if len(selection.ids) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} ids per request")
+    # Per-id results in request order; each chunk updates the ids it finds.
+    ids, statuses = [], {}
+    for id in selection.ids:
+        if not ObjectId.is_valid(id):
+            statuses[id] = "invalid_id"
+            continue
+        post_id = ObjectId(id)
+        if str(post_id) not in statuses:
+            ids.append(post_id)
+            statuses[str(post_id)] = "not_found"
+    return ids, statuses
+
+
+def _select(selection: BulkPostSelection) -> tuple[list | None, dict, dict]:
+    if bool(selection.ids) == bool(selection.filter):
+        raise HTTPException(status_code=400, detail="Send either ids or filter")
+    if selection.ids:
+        ids, statuses = _requested_ids(selection)
+        return ids, {}, statuses
+    return None, _filter_query(selection), {}
+
+
+async def _chunks(db, ids: list | None, query: dict, fields: dict, chunk_size: int):
+    # Yields the posts that exist, chunk by chunk: the requested ids, or every
+    # post matching the filter in _id order.
+    if ids is not None:
+        for offset in range(0, len(ids), chunk_size):
+            chunk = ids[offset:offset + chunk_size]
+            yield await db.forumPost.find({"_id": {"$in": chunk}}, fields).to_list(None)
+        return
+    last_id = None
+    while True:
+        page = {**query, "_id": {"$gt": last_id}} if last_id is not None else query
+        docs = await db.forumPost.find(page, fields).sort("_id", 1).limit(chunk_size).to_list(chunk_size)
+        if not docs:
+            return
+        yield docs
+        last_id = docs[-1]["_id"]
+
+
+def _response(selection: BulkPostSelection, statuses: dict, **counts) -> dict:
+    return {
+        "dry_run": selection.dry_run,
+        **counts,
+        "results": [{"id": id, "status": status} for id, status in statuses.items()],
+    }
+
+
+async def update_posts(db, selection: BulkPostSelection, update_fields: dict, chunk_size: int) -> dict:
+    ids, query, statuses = _select(selection)
+    matched = modified = 0
+    fields = {field: 1 for field in update_fields}
+    async for docs in _chunks(db, ids, query, fields, chunk_size):
+        matched += len(docs)
+        changed = [doc["_id"] for doc in docs if any(doc.get(field) != value for field, value in update_fields.items())]
+        if changed and not selection.dry_run:
+            # The $ne filter repeats the check, so a concurrent identical edit is not counted twice.
+            result = await db.forumPost.update_many(
+                {"_id": {"$in": changed}, "$or": [{field: {"$ne": value}} for field, value in update_fields.items()]},
+                {"$set": update_fields, "$inc": {"version": 1}},
+            )
+            modified += result.modified_count
+            await response_cache.invalidate("posts", *(f"post:{post_id}" for post_id in changed))
+        else:
+            modified += len(changed)
+        if statuses:
+            changed_ids = set(changed)
+            for doc in docs:
+                if doc["_id"] in changed_ids:
+                    statuses[str(doc["_id"])] = "would_update" if selection.dry_run else "updated"
+                else:
+                    statuses[str(doc["_id"])] = "unchanged"
+    return _response(selection, statuses, matched_count=matched, modified_count=modified)
+
+
+async def delete_posts(db, selection: BulkPostSelection, chunk_size: int) -> dict:
+    ids, query, statuses = _select(selection)
+    matched = deleted = comments_deleted = 0
+    async for docs in _chunks(db, ids, query, {"_id": 1}, chunk_size):
+        post_ids = [doc["_id"] for doc in docs]
+        matched += len(post_ids)
+        # Comments reference their post by string (API) or ObjectId (seed scripts).
+        comment_query = {"forumPost_id": {"$in": post_ids + [str(post_id) for post_id in post_ids]}}
+        if selection.dry_run:
+            deleted += len(post_ids)
+            comments_deleted += await db.forumComment.count_documents(comment_query)
+        else:
+            chunk_deleted = (await db.forumPost.delete_many({"_id": {"$in": post_ids}})).deleted_count
+            chunk_comments = (await db.forumComment.delete_many(comment_query)).deleted_count
+            await counters.remove_posts(db, chunk_deleted, chunk_comments)
+            await response_cache.invalidate("posts", *(f"post:{post_id}" for post_id in post_ids))
+            deleted += chunk_deleted
+            comments_deleted += chunk_comments
+        if statuses:
+            for post_id in post_ids:
+                statuses[str(post_id)] = "would_delete" if selection.dry_run else "deleted"
+    return _response(
+        selection, statuses, matched_count=matched, deleted_count=deleted, comments_deleted=comments_deleted
+    )
@@ -0,0 +1,38 @@
+import base64
+import binascii
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+
+
+def encode_cursor(doc: dict, sort_by: str, order: str) -> str:
+    state = {"s": sort_by, "o": order, "v": doc.get(sort_by), "id": doc["_id"]}
+    return base64.urlsafe_b64encode(json_util.dumps(state).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = state["v"], state["id"]
+        valid = state["s"] == sort_by and state["o"] == order and isinstance(last_id, ObjectId)
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+
+def keyset_filter(sort_by: str, order: str, value, last_id: ObjectId) -> dict:
+    # Documents strictly after (value, last_id) in the (sort_by, _id) ordering.
+    # Missing/null sort values come first in ascending order, so they need
+    # their own branches: range operators never match across types.
+    op = "$gt" if order == "asc" else "$lt"
+    tie = {sort_by: value, "_id": {op: last_id}}
+    if value is None:
+        if order == "asc":
+            return {"$or": [{sort_by: {"$ne": None}}, tie]}
+        return tie
+    after = {sort_by: {op: value}}
+    if order == "desc":
+        return {"$or": [after, tie, {sort_by: None}]}
+    return {"$or": [after, tie]}
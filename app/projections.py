@@ -0,0 +1,31 @@
+from fastapi import HTTPException
+
+# Fields a client may select with `fields=`; anything else (the password hash,
+# internal search keys) is never loaded on public reads.
+USER_FIELDS = ["_id", "username", "email", "role", "disabled", "version"]
+USER_SUMMARY_FIELDS = ["_id", "username", "role", "version"]
+POST_FIELDS = [
+    "_id", "user_id", "title", "content", "type", "created_at", "comment_count", "last_comment_at", "version",
+    "hidden",
+]
+
+# What list endpoints return when no `fields=` is given: enough to render a
+# feed without shipping every post body.
+POST_SUMMARY_FIELDS = ["_id", "user_id", "title", "type", "created_at", "comment_count"]
+
+
+def parse_fields(fields: str | None, allowed: list[str], default: list[str] | None = None) -> list[str]:
+    if not fields:
+        return list(default or allowed)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def projection(fields: list[str]) -> dict:
+    spec = {field: 1 for field in fields}
+    if "_id" not in spec:
+        spec["_id"] = 0
+    return spec
@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Query
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+load_dotenv()
+QUERY_MONITOR_ENABLED = os.getenv("QUERY_MONITOR_ENABLED", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Run explain("executionStats") once for each shape that is ever slow, on a
+# background thread, and warn when the winning plan has no index scan.
+QUERY_EXPLAIN_SLOW = os.getenv("QUERY_EXPLAIN_SLOW", "0") == "1"
+QUERY_MONITOR_MAX_SHAPES = int(os.getenv("QUERY_MONITOR_MAX_SHAPES", "1000"))
+# GET/DELETE /debug/queries expose query shapes and plans without auth; only
+# serve them where the port is not public.
+QUERY_MONITOR_ROUTES = os.getenv("QUERY_MONITOR_ROUTES", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+# Fields of each command that decide its plan; everything else (lsid,
+# $clusterTime, batchSize, ...) is left out of the shape.
+SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection", "hint"),
+    "aggregate": ("pipeline", "hint"),
+    "count": ("query", "hint"),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort", "update", "remove", "upsert"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+    "insert": (),
+}
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Sort and projection values are directions/flags, not user data; keep them.
+VERBATIM_KEYS = {"sort", "projection", "hint", "key", "$sort", "$project"}
+EXPLAIN_DROPPED_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern", "readConcern"}
+
+
+def normalize(value, key: str | None = None):
+    # Replaces literal values with "?" so queries that differ only in their
+    # values share one shape; lists keep each distinct element shape once.
+    if key in VERBATIM_KEYS:
+        return value
+    if isinstance(value, dict):
+        return {k: normalize(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = normalize(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> dict:
+    shape = {"command": command_name, "collection": command.get(command_name)}
+    for field in SHAPE_FIELDS.get(command_name, ()):
+        if field in command:
+            shape[field] = normalize(command[field], field)
+    return shape
+
+
+def explain_command(command_name: str, command: dict) -> dict | None:
+    if command_name not in EXPLAINABLE:
+        return None
+    if command_name == "aggregate" and any("$out" in stage or "$merge" in stage for stage in command.get("pipeline", [])):
+        return None
+    explained = {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in EXPLAIN_DROPPED_FIELDS
+    }
+    # explain takes a single write statement.
+    for field in ("updates", "deletes"):
+        if field in explained:
+            explained[field] = explained[field][:1]
+    return explained
+
+
+def summarize_plan(explain: dict) -> dict:
+    stages = []
+    execution = {}
+
+    def walk(node, in_plan: bool):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "stage" and in_plan and isinstance(value, str) and value not in stages:
+                    stages.append(value)
+                elif key == "executionStats" and isinstance(value, dict) and not execution:
+                    execution.update({
+                        field: value.get(field)
+                        for field in ("nReturned", "totalKeysExamined", "totalDocsExamined", "executionTimeMillis")
+                    })
+                walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain, False)
+    return {"stages": stages, "collection_scan": "COLLSCAN" in stages, **execution}
+
+
+class ShapeStats:
+    __slots__ = ("shape", "count", "errors", "total_seconds", "max_seconds", "slow", "explain", "plan")
+
+    def __init__(self, shape: dict):
+        self.shape = shape
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow = 0
+        self.explain = None
+        self.plan = None
+
+    def as_dict(self) -> dict:
+        return {
+            "shape": self.shape,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "slow": self.slow,
+            "plan": self.plan,
+        }
+
+
+class QueryMonitor(monitoring.CommandListener):
+    def __init__(self, slow_ms: float, explain_slow: bool, max_shapes: int):
+        self.slow_seconds = slow_ms / 1000
+        self.explain_slow = explain_slow
+        self.max_shapes = max_shapes
+        # Sync PyMongo client used for explain; set to the Motor client's delegate.
+        self.client = None
+        self.shapes: OrderedDict[str, ShapeStats] = OrderedDict()
+        self._pending = {}
+        self._cursors: OrderedDict[int, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-explain")
+
+    def started(self, event):
+        name = event.command_name
+        request = (event.connection_id, event.request_id)
+        if name == "getMore":
+            # Batches of a cursor count towards the query that opened it.
+            cursor_id = event.command.get("getMore")
+            key = self._cursors.get(cursor_id)
+            if key is not None:
+                self._pending[request] = (key, None, None, cursor_id)
+            return
+        if name not in SHAPE_FIELDS:
+            return
+        shape = command_shape(name, event.command)
+        explain = explain_command(name, event.command) if self.explain_slow else None
+        self._pending[request] = (json.dumps(shape, default=str), shape, (event.database_name, explain), None)
+
+    def succeeded(self, event):
+        entry = self._pending.pop((event.connection_id, event.request_id), None)
+        if entry is None:
+            return
+        self._record(event, entry, failed=False)
+        cursor = event.reply.get("cursor")
+        if isinstance(cursor, dict):
+            with self._lock:
+                if cursor.get("id"):
+                    self._cursors[cursor["id"]] = entry[0]
+                    while len(self._cursors) > self.max_shapes:
+                        self._cursors.popitem(last=False)
+                else:
+                    self._cursors.pop(entry[3], None)
+
+    def failed(self, event):
+        entry = self._pending.pop((event.connection_id, event.request_id), None)
+        if entry is not None:
+            self._record(event, entry, failed=True)
+
+    def _record(self, event, entry: tuple, failed: bool):
+        key, shape, explain, _ = entry
+        seconds = event.duration_micros / 1e6
+        is_slow = seconds >= self.slow_seconds
+        run_explain = False
+        with self._lock:
+            stats = self.shapes.get(key)
+            if stats is None:
+                if shape is None:
+                    return
+                stats = self.shapes[key] = ShapeStats(shape)
+                while len(self.shapes) > self.max_shapes:
+                    self.shapes.popitem(last=False)
+            stats.count += 1
+            stats.errors += failed
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if is_slow:
+                stats.slow += 1
+                if explain is not None and explain[1] is not None and stats.explain is None:
+                    stats.explain = explain
+                    run_explain = True
+        if is_slow:
+            logger.warning(
+                "Slow %s on %s: %.1f ms, shape %s", event.command_name, stats.shape["collection"], seconds * 1000, key
+            )
+        if run_explain and self.client is not None:
+            self._explainer.submit(self._explain, stats)
+
+    def _explain(self, stats: ShapeStats):
+        database_name, command = stats.explain
+        try:
+            result = self.client[database_name].command({"explain": command, "verbosity": "executionStats"})
+        except PyMongoError as exc:
+            stats.plan = {"error": str(exc)}
+            return
+        stats.plan = summarize_plan(result)
+        if stats.plan["collection_scan"]:
+            logger.warning(
+                "No index used by %s on %s (%s docs examined): %s",
+                stats.shape["command"], stats.shape["collection"], stats.plan.get("totalDocsExamined"),
+                json.dumps(stats.shape, default=str),
+            )
+
+    def report(self, sort: str = "total_ms", limit: int = 50) -> list[dict]:
+        with self._lock:
+            rows = [stats.as_dict() for stats in self.shapes.values()]
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self.shapes.clear()
+
+    def shutdown(self):
+        self._explainer.shutdown(wait=False, cancel_futures=True)
+
+
+monitor = QueryMonitor(SLOW_QUERY_MS, QUERY_EXPLAIN_SLOW, QUERY_MONITOR_MAX_SHAPES)
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/queries")
+async def query_shapes(
+    sort: str = Query("total_ms", enum=["total_ms", "mean_ms", "max_ms", "count", "slow"]),
+    limit: int = Query(50, ge=1, le=1000),
+    collection_scans: bool = Query(False, description="Only shapes whose explained plan has a COLLSCAN"),
+):
+    rows = monitor.report(sort, QUERY_MONITOR_MAX_SHAPES if collection_scans else limit)
+    if collection_scans:
+        rows = [row for row in rows if (row["plan"] or {}).get("collection_scan")][:limit]
+    return {"slow_query_ms": SLOW_QUERY_MS, "explain": QUERY_EXPLAIN_SLOW, "shapes": rows}
+
+
+@router.delete("/queries")
+async def reset_query_shapes():
+    monitor.reset()
+    return {"message": "✅ Query statistics reset"}
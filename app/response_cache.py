@@ -0,0 +1,162 @@
+import hashlib
+import importlib
+import os
+import re
+from fastapi import Request, Response
+from app import metrics
+from app.cache import TTLCache
+from app.serialization import dumps
+from dotenv import load_dotenv
+
+load_dotenv()
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+# With the in-process backend each worker invalidates only its own copy, so
+# another worker may serve a changed resource for up to this long.
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_MAXSIZE = int(os.getenv("RESPONSE_CACHE_MAXSIZE", "5000"))
+# "memory", or "package.module:factory" returning an object with the same
+# async get/set/invalidate/stats methods as MemoryBackend (e.g. one backed by a
+# store shared between workers).
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+
+
+# A rendered response body with its ETag, extra headers and the tags
+# (e.g. "post:<id>", "posts") whose writes invalidate it.
+class CachedResponse:
+    __slots__ = ("body", "etag", "headers", "tags")
+
+    def __init__(self, body: bytes, etag: str, headers: dict, tags: tuple):
+        self.body = body
+        self.etag = etag
+        self.headers = headers
+        self.tags = tags
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._unindex)
+        # tag -> keys of the cached entries carrying it, so invalidation only
+        # touches matching entries instead of scanning the whole cache.
+        self._keys_by_tag: dict[str, set] = {}
+
+    def _unindex(self, key: str, entry: CachedResponse):
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    async def get(self, key: str) -> CachedResponse | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, entry: CachedResponse):
+        self._cache.set(key, entry)
+        if key not in self._cache:
+            return
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, tags: set):
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._cache.pop(key)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def load_backend(spec: str):
+    if spec == "memory":
+        return MemoryBackend(RESPONSE_CACHE_MAXSIZE, RESPONSE_CACHE_TTL_SECONDS)
+    module_name, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+backend = load_backend(RESPONSE_CACHE_BACKEND)
+
+
+def cache_key(route: str, params: dict) -> str:
+    # Parameters left at None are dropped, so ?a=1 and ?a=1&b= share an entry.
+    query = "&".join(f"{name}={value}" for name, value in sorted(params.items()) if value is not None)
+    return f"{route}?{query}"
+
+
+_ETAG_VERSION = re.compile(r'^(?:W/)?"v(\d+)-')
+
+
+def make_etag(key: str, versions, version: int | None = None) -> str:
+    # ETag over the request and the version of every document in the body.
+    # Single resources pass their own `version`, which prefixes the tag so
+    # it can be sent back in If-Match; lists get a weak tag.
+    digest = hashlib.blake2b(repr((key, versions)).encode(), digest_size=12).hexdigest()
+    if version is None:
+        return f'W/"{digest}"'
+    return f'"v{version}-{digest}"'
+
+
+def if_match_versions(request: Request) -> list[int] | None:
+    # None when there is no precondition (no If-Match, or "*"); an If-Match
+    # naming none of our tags yields [] and can never match.
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        match = _ETAG_VERSION.match(tag.strip())
+        if match:
+            versions.append(int(match.group(1)))
+    return versions
+
+
+def version_filter(versions: list[int]) -> dict:
+    # Documents written before versioning have no field and count as version 0.
+    return {"version": {"$in": versions + [None] if 0 in versions else versions}}
+
+
+def post_version(post: dict) -> tuple:
+    # Comments change a post's counters without bumping its version; an
+    # expanded author contributes its own version.
+    author = post.get("user") or {}
+    return (
+        post.get("_id"), post.get("version", 0), post.get("comment_count", 0), post.get("last_comment_at"),
+        author.get("version"),
+    )
+
+
+async def get(key: str | None) -> CachedResponse | None:
+    if not RESPONSE_CACHE_ENABLED or key is None:
+        return None
+    return await backend.get(key)
+
+
+async def store(key: str | None, content, etag: str, tags=(), headers: dict | None = None) -> CachedResponse:
+    # Renders once; the entry is cached only when a key is given.
+    with metrics.timed("serialization"):
+        body = dumps(content)
+    entry = CachedResponse(body, etag, headers or {}, tuple(tags))
+    if RESPONSE_CACHE_ENABLED and key is not None:
+        await backend.set(key, entry)
+    return entry
+
+
+async def invalidate(*tags: str):
+    if RESPONSE_CACHE_ENABLED:
+        await backend.invalidate(set(tags))
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison.
+    opaque = etag.removeprefix("W/")
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def respond(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", **entry.headers}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
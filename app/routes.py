@@ -1,25 +1,45 @@
 from app import auth
-import os
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Annotated, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Security
+from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Security
 from fastapi.security import OAuth2PasswordRequestForm
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from app.models import User, ForumPost, ResponseMessage, Token
-from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.database import get_db
+from app.bulk import BULK_CHUNK_SIZE, bulk_insert, read_items
+from app.classrooms import sync_user_classrooms
+from app import counters, moderation, response_cache, transactions
+from app.export import EXPORT_BATCH_SIZE, stream_export
+from app.models import (
+    User, UserOut, UserUpdate, ForumPost, ForumPostOut, ForumPostUpdate, ForumComment, ResponseMessage, BulkResponse,
+    BulkPostSelection, BulkPostUpdate, BulkModerationResponse, CreatedResponse, Token,
+)
+from app.loader import Loaders, get_loaders, to_object_id
+from app.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.projections import POST_FIELDS, POST_SUMMARY_FIELDS, USER_FIELDS, parse_fields, projection
+from app.search import prefix_filter, with_title_key
+
+Database = Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+RequestLoaders = Annotated[Loaders, Depends(get_loaders)]
 
-load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+router = APIRouter()
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client.education_website 
 
-router = APIRouter()
+def duplicate_user_error(exc: DuplicateKeyError) -> HTTPException:
+    # Uniqueness is enforced by the unique indexes on user.email / user.username.
+    key_pattern = (exc.details or {}).get("keyPattern", {})
+    if "username" in key_pattern:
+        return HTTPException(status_code=400, detail="Username already registered")
+    return HTTPException(status_code=400, detail="Email already registered")
+
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    db: Database,
 ) -> Token:
     user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -31,7 +51,7 @@ async def login_for_access_token(
     )
     return Token(access_token=access_token, token_type="bearer")
 
-@router.get("/users/me/", response_model=User)
+@router.get("/users/me/", response_model=UserOut)
 async def read_users_me(
     current_user: Annotated[User, Depends(auth.get_current_active_user)],
 ):
@@ -48,160 +68,545 @@ async def read_system_status(current_user: Annotated[User, Depends(auth.get_curr
     return {"status": "ok"}
 
 
-@router.get("/posts/", response_model=List[ForumPost])
+def build_post_query(
+    q: Optional[str] = None,
+    prefix: Optional[str] = None,
+    title: Optional[str] = None,
+    post_type: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> dict:
+    # Posts hidden by moderators stay readable by id but are never listed.
+    query = {"hidden": {"$ne": True}}
+
+    # `q` uses the text index on title/content; `prefix` is index-backed
+    # autocomplete on the title. `title` is the legacy unanchored regex.
+    if q:
+        query["$text"] = {"$search": q}
+    if prefix:
+        query.update(prefix_filter(prefix))
+    if title:
+        query["title"] = {"$regex": title, "$options": "i"}  
+    if post_type:
+        query["type"] = post_type
+    if user_id:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(status_code=400, detail="Invalid user ID format")
+        # Posts created through the API store user_id as a string, the seed
+        # scripts as an ObjectId; match both.
+        query["user_id"] = {"$in": [str(ObjectId(user_id)), ObjectId(user_id)]}
+
+    return query
+
+
+async def update_versioned(
+    collection, id: str, update_fields: dict, request: Request, fields: list[str], not_found: str,
+    password: str | None = None,
+):
+    # One round trip on the normal path: the filter only matches when If-Match
+    # (if sent) names the current version and some field actually changes, so
+    # a retried PATCH neither bumps the version nor looks like a missing document.
+    # `password` is the plaintext behind update_fields["password"]: a fresh hash
+    # never equals the stored one, so it always counts as a change and a retry
+    # is recognised by verifying it against the stored hash instead.
+    query = {"_id": ObjectId(id)}
+    versions = response_cache.if_match_versions(request)
+    if versions is not None:
+        query.update(response_cache.version_filter(versions))
+    compared = {field: value for field, value in update_fields.items() if field != "password" or password is None}
+    if password is None:
+        query["$or"] = [{field: {"$ne": value}} for field, value in compared.items()]
+    doc = await collection.find_one_and_update(
+        query,
+        {"$set": update_fields, "$inc": {"version": 1}},
+        projection=projection(fields),
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is not None:
+        return doc, True
+
+    # Also read the updated fields, to tell a retry of an applied PATCH from a stale one.
+    extra = [field for field in update_fields if field not in fields]
+    doc = await collection.find_one({"_id": ObjectId(id)}, projection(fields + extra))
+    if doc is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    applied = all(doc.get(field) == value for field, value in compared.items())
+    if applied and password is not None:
+        applied = bool(doc.get("password")) and await auth.verify_password(password, doc["password"])
+    if not applied and versions is not None and doc.get("version", 0) not in versions:
+        raise HTTPException(status_code=412, detail="Version mismatch, reload and retry")
+    for field in extra:
+        doc.pop(field, None)
+    return doc, False
+
+
+@router.get("/posts/", response_model=List[ForumPostOut])
 async def fetch_posts(
+    request: Request,
+    db: Database,
+    loaders: RequestLoaders,
     page: int = Query(1, ge=1), 
     page_size: int = Query(10, le=100),  
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    prefix: Optional[str] = None,
     title: Optional[str] = None,  
     post_type: Optional[str] = None, 
     user_id: Optional[str] = None, 
-    sort_by: Optional[str] = Query("created_at", enum=["created_at", "title"]),
-    order: Optional[str] = Query("desc", enum=["asc", "desc"]) 
+    sort_by: Optional[str] = Query("created_at", enum=["created_at", "title", "comment_count", "score"]),
+    order: Optional[str] = Query("desc", enum=["asc", "desc"]),
+    fields: Optional[str] = Query(None, description="Comma-separated; defaults to a summary without content"),
+    expand: Optional[str] = Query(None, enum=["user"]),
 ):
-    query = {}
-
-    if title:
-        query["title"] = {"$regex": title, "$options": "i"}  
-    if post_type:
-        query["type"] = post_type
-    if user_id:
-        query["user_id"] = ObjectId(user_id)
+    query = build_post_query(q, prefix, title, post_type, user_id)
+    selected = parse_fields(fields, POST_FIELDS, POST_SUMMARY_FIELDS)
+
+    if sort_by == "score":
+        if not q:
+            raise HTTPException(status_code=400, detail="sort_by=score requires q")
+        if cursor:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not supported with sort_by=score")
+
+    # First pages without a search take most of the traffic and are cached;
+    # every page still gets an ETag for If-None-Match.
+    key = None
+    if not (cursor or q or prefix or title) and page == 1:
+        key = response_cache.cache_key("posts", {
+            "page_size": page_size, "post_type": post_type, "user_id": user_id,
+            "sort_by": sort_by, "order": order, "fields": fields, "expand": expand,
+        })
+        entry = await response_cache.get(key)
+        if entry is not None:
+            return response_cache.respond(request, entry)
+
+    # `cursor` (from the X-Next-Cursor header of the previous page) seeks with a
+    # range predicate on (sort_by, _id); `page` is kept for older clients.
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, order)
+        after = keyset_filter(sort_by, order, value, last_id)
+        query = {"$and": [query, after]} if query else after
+
+    # The cursor needs (sort_by, _id) from the last row and the ETag the
+    # versions, even if they were not requested.
+    spec = projection(selected)
+    needed = (sort_by, "_id", "version", "comment_count", "last_comment_at")
+    if expand == "user":
+        needed += ("user_id",)
+    extra = [field for field in needed if field != "score" and spec.get(field) != 1]
+    spec.update({field: 1 for field in extra})
 
     sort_order = 1 if order == "asc" else -1
-    sort_field = {sort_by: sort_order}
-
-    posts = await db.forumPost.find(query).sort(sort_field).skip((page - 1) * page_size).limit(page_size).to_list(page_size)
-    
-    for post in posts:
-        post["_id"] = str(post["_id"])
-        post["user_id"] = str(post["user_id"])
-
-    return posts
+    if sort_by == "score":
+        score = {"$meta": "textScore"}
+        spec["score"] = score
+        find = db.forumPost.find(query, spec).sort([("score", score), ("_id", -1)])
+    else:
+        find = db.forumPost.find(query, spec).sort([(sort_by, sort_order), ("_id", sort_order)])
+    if not cursor:
+        find = find.skip((page - 1) * page_size)
+    posts = await find.limit(page_size).to_list(page_size)
+
+    headers = {}
+    if len(posts) == page_size and sort_by != "score":
+        headers["X-Next-Cursor"] = encode_cursor(posts[-1], sort_by, order)
+    tags = ["posts"]
+    if expand == "user":
+        # One $in query for every author on the page.
+        authors = await loaders.user.load_many([post.get("user_id") for post in posts])
+        for post, author in zip(posts, authors):
+            post["user"] = author
+        tags += [f"user:{author['_id']}" for author in authors if author]
+    etag_key = key or response_cache.cache_key("posts", dict(request.query_params))
+    etag = response_cache.make_etag(etag_key, [response_cache.post_version(post) for post in posts])
+    if extra:
+        for post in posts:
+            for field in extra:
+                post.pop(field, None)
+
+    entry = await response_cache.store(key, posts, etag, tags, headers)
+    return response_cache.respond(request, entry)
 
 # ✅ Create a User (POST /users/)
 @router.post("/users/", response_model=ResponseMessage)
-async def create_user(user: User):
-    existing_user = await db.user.find_one({"email": user.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    hashed_password = auth.get_password_hash(user.password)
+async def create_user(user: User, db: Database):
+    hashed_password = await auth.get_password_hash(user.password)
 
     user_data = user.dict(by_alias=True)
     user_data["_id"] = ObjectId()
     user_data["password"] = hashed_password 
 
-    await db.user.insert_one(user_data)
+    try:
+        await db.user.insert_one(user_data)
+    except DuplicateKeyError as exc:
+        raise duplicate_user_error(exc)
 
     return {"message": "✅ User created successfully!"}
 
+# ✅ Create Users in bulk (POST /users/bulk, JSON array or NDJSON)
+@router.post("/users/bulk", response_model=BulkResponse)
+async def create_users_bulk(
+    request: Request, db: Database, chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)
+):
+    async def prepare(users: list[User]):
+        hashes = await auth.get_password_hashes_bulk([user.password for user in users])
+        docs = []
+        for user, hashed_password in zip(users, hashes):
+            user_data = user.dict(by_alias=True)
+            user_data["password"] = hashed_password
+            docs.append(user_data)
+        return docs
+
+    items = await read_items(request)
+    return await bulk_insert(items, User, db.user, prepare, chunk_size)
+
+# ✅ Export Users as NDJSON or CSV (GET /users/export)
+@router.get("/users/export")
+async def export_users(
+    db: Database,
+    current_user: Annotated[User, Depends(auth.get_current_active_user)],
+    role: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated; password is never exported"),
+    format: str = Query("ndjson", enum=["ndjson", "csv"]),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+):
+    selected = parse_fields(fields, USER_FIELDS)
+    query = {"role": role} if role else {}
+    cursor = db.user.find(query, projection(selected)).sort("_id", 1)
+    return stream_export(cursor, selected, format, "users", batch_size)
+
 # ✅ Get a User by ID (GET /users/{id})
-@router.get("/users/{id}", response_model=User)
-async def get_user(id: str):
+@router.get("/users/{id}", response_model=UserOut)
+async def get_user(
+    id: str,
+    request: Request,
+    db: Database,
+    fields: Optional[str] = Query(None, description="Comma-separated; password is never returned"),
+):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid user ID format")
+    # Cache keys and invalidation tags use the canonical lowercase form.
+    id = str(ObjectId(id))
 
-    user = await db.user.find_one({"_id": ObjectId(id)})
+    key = response_cache.cache_key("user", {"id": id, "fields": fields})
+    entry = await response_cache.get(key)
+    if entry is not None:
+        return response_cache.respond(request, entry)
+
+    selected = parse_fields(fields, USER_FIELDS)
+    user = await db.user.find_one({"_id": ObjectId(id)}, {**projection(selected), "version": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user["_id"] = str(user["_id"])
-    return user
+    etag = response_cache.make_etag(key, user.get("version", 0), version=user.get("version", 0))
+    if "version" not in selected:
+        user.pop("version", None)
+    entry = await response_cache.store(key, user, etag, [f"user:{id}"])
+    return response_cache.respond(request, entry)
 
 # ✅ Update a User (PATCH /users/{id})
-@router.patch("/users/{id}", response_model=ResponseMessage)
-async def update_user(id: str, update_data: dict):
+@router.patch("/users/{id}", response_model=UserOut)
+async def update_user(id: str, update_data: UserUpdate, request: Request, db: Database):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid user ID format")
+    id = str(ObjectId(id))
 
-    update_fields = {key: value for key, value in update_data.items() if value is not None}
+    update_fields = update_data.dict(exclude_none=True)
     if not update_fields:
         raise HTTPException(status_code=400, detail="No valid fields to update")
-
-    result = await db.user.update_one({"_id": ObjectId(id)}, {"$set": update_fields})
-
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="User not found or no changes applied")
-
-    return {"message": "✅ User updated successfully!"}
+    password = update_fields.get("password")
+    if password is not None:
+        update_fields["password"] = await auth.get_password_hash(password)
+
+    try:
+        user, modified = await update_versioned(
+            db.user, id, update_fields, request, USER_FIELDS, "User not found", password=password
+        )
+    except DuplicateKeyError as exc:
+        raise duplicate_user_error(exc)
+    if modified:
+        auth.invalidate_user(user_id=id)
+        await response_cache.invalidate(f"user:{id}")
+        await sync_user_classrooms(db, ObjectId(id))
+
+    key = response_cache.cache_key("user", {"id": id})
+    etag = response_cache.make_etag(key, user.get("version", 0), version=user.get("version", 0))
+    entry = await response_cache.store(key, user, etag, [f"user:{id}"])
+    return response_cache.respond(request, entry)
 
 # ✅ Delete a User (DELETE /users/{id})
 @router.delete("/users/{id}", response_model=ResponseMessage)
-async def delete_user(id: str):
+async def delete_user(id: str, db: Database):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid user ID format")
+    id = str(ObjectId(id))
 
     result = await db.user.delete_one({"_id": ObjectId(id)})
+    auth.invalidate_user(user_id=id)
+    await response_cache.invalidate(f"user:{id}")
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
 
+    await sync_user_classrooms(db, ObjectId(id))
     return {"message": "✅ User deleted successfully!"}
 
 # ✅ Create a Post (POST /posts/)
-@router.post("/posts/", response_model=ResponseMessage)
-async def create_post(post: ForumPost):
+@router.post("/posts/", response_model=CreatedResponse)
+async def create_post(post: ForumPost, db: Database):
     post_data = post.dict(by_alias=True)
     post_data["_id"] = ObjectId()
+    post_data["created_at"] = datetime.now(timezone.utc)
+    post_data["comment_count"] = 0
+    with_title_key(post_data)
 
     await db.forumPost.insert_one(post_data)
-    return {"message": "✅ Post created successfully!"}
+    await counters.add_posts(db, 1)
+    await response_cache.invalidate("posts")
+    return {"message": "✅ Post created successfully!", "id": str(post_data["_id"])}
+
+# ✅ Create Posts in bulk (POST /posts/bulk, JSON array or NDJSON)
+@router.post("/posts/bulk", response_model=BulkResponse)
+async def create_posts_bulk(
+    request: Request, db: Database, chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)
+):
+    async def prepare(posts: list[ForumPost]):
+        created_at = datetime.now(timezone.utc)
+        docs = []
+        for post in posts:
+            post_data = post.dict(by_alias=True)
+            post_data["created_at"] = created_at
+            post_data["comment_count"] = 0
+            docs.append(with_title_key(post_data))
+        return docs
+
+    async def after_insert(docs: list[dict]):
+        await counters.add_posts(db, len(docs))
+        await response_cache.invalidate("posts")
+
+    items = await read_items(request)
+    return await bulk_insert(items, ForumPost, db.forumPost, prepare, chunk_size, after_insert)
+
+# ✅ Update Posts in bulk by ids or filter (PATCH /posts/bulk)
+@router.patch("/posts/bulk", response_model=BulkModerationResponse)
+async def update_posts_bulk(
+    body: BulkPostUpdate,
+    db: Database,
+    moderator: Annotated[User, Depends(auth.get_current_moderator)],
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000),
+):
+    update_fields = body.update.dict(exclude_none=True)
+    if not update_fields:
+        raise HTTPException(status_code=400, detail="No valid fields to update")
+
+    with_title_key(update_fields)
+    return await moderation.update_posts(db, body, update_fields, chunk_size)
+
+# ✅ Delete Posts and their Comments in bulk by ids or filter (DELETE /posts/bulk)
+@router.delete("/posts/bulk", response_model=BulkModerationResponse)
+async def delete_posts_bulk(
+    body: BulkPostSelection,
+    db: Database,
+    moderator: Annotated[User, Depends(auth.get_current_moderator)],
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000),
+):
+    return await moderation.delete_posts(db, body, chunk_size)
+
+# ✅ Create Comments in bulk (POST /comments/bulk, JSON array or NDJSON)
+@router.post("/comments/bulk", response_model=BulkResponse)
+async def create_comments_bulk(
+    request: Request, db: Database, chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)
+):
+    created_at = datetime.now(timezone.utc)
+
+    async def prepare(comments: list[ForumComment]):
+        post_ids = {to_object_id(comment.forumPost_id) for comment in comments}
+        found = await db.forumPost.find({"_id": {"$in": list(post_ids)}}, {"_id": 1}).to_list(None)
+        existing = {post["_id"] for post in found}
+        docs = []
+        for comment in comments:
+            if to_object_id(comment.forumPost_id) not in existing:
+                docs.append("Post not found")
+                continue
+            comment_data = comment.dict(by_alias=True)
+            comment_data["created_at"] = created_at
+            docs.append(comment_data)
+        return docs
+
+    async def after_insert(docs: list[dict]):
+        post_counts = Counter(to_object_id(doc["forumPost_id"]) for doc in docs)
+        await counters.add_comments(db, post_counts, created_at)
+        await response_cache.invalidate("posts", *(f"post:{post_id}" for post_id in post_counts))
+
+    items = await read_items(request)
+    return await bulk_insert(items, ForumComment, db.forumComment, prepare, chunk_size, after_insert)
+
+# ✅ Export Posts as NDJSON or CSV (GET /posts/export), same filters as GET /posts/
+@router.get("/posts/export")
+async def export_posts(
+    db: Database,
+    q: Optional[str] = None,
+    prefix: Optional[str] = None,
+    title: Optional[str] = None,
+    post_type: Optional[str] = None,
+    user_id: Optional[str] = None,
+    sort_by: Optional[str] = Query("created_at", enum=["created_at", "title"]),
+    order: Optional[str] = Query("desc", enum=["asc", "desc"]),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of the post fields"),
+    format: str = Query("ndjson", enum=["ndjson", "csv"]),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+):
+    selected = parse_fields(fields, POST_FIELDS)
+    query = build_post_query(q, prefix, title, post_type, user_id)
+    sort_order = 1 if order == "asc" else -1
+    cursor = db.forumPost.find(query, projection(selected)).sort([(sort_by, sort_order), ("_id", sort_order)])
+    return stream_export(cursor, selected, format, "posts", batch_size)
+
+# ✅ Forum totals and averages from the maintained counters (GET /posts/stats)
+@router.get("/posts/stats")
+async def get_post_stats(db: Database):
+    return await counters.forum_stats(db)
 
 # ✅ Get a Post by ID (GET /posts/{id})
-@router.get("/posts/{id}", response_model=ForumPost)
-async def get_post(id: str):
+@router.get("/posts/{id}", response_model=ForumPostOut)
+async def get_post(
+    id: str,
+    request: Request,
+    db: Database,
+    loaders: RequestLoaders,
+    fields: Optional[str] = Query(None, description="Comma-separated"),
+    expand: Optional[str] = Query(None, enum=["user"]),
+):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid post ID format")
-
-    post = await db.forumPost.find_one({"_id": ObjectId(id)})
+    id = str(ObjectId(id))
+
+    key = response_cache.cache_key("post", {"id": id, "fields": fields, "expand": expand})
+    entry = await response_cache.get(key)
+    if entry is not None:
+        return response_cache.respond(request, entry)
+
+    selected = parse_fields(fields, POST_FIELDS)
+    spec = projection(selected)
+    needed = ("version", "comment_count", "last_comment_at")
+    if expand == "user":
+        needed += ("user_id",)
+    extra = [field for field in needed if spec.get(field) != 1]
+    spec.update({field: 1 for field in extra})
+    post = await db.forumPost.find_one({"_id": ObjectId(id)}, spec)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    post["_id"] = str(post["_id"])
-    return post
+    tags = [f"post:{id}"]
+    if expand == "user":
+        post["user"] = await loaders.user.load(post.get("user_id"))
+        if post["user"]:
+            tags.append(f"user:{post['user']['_id']}")
+    etag = response_cache.make_etag(key, response_cache.post_version(post), version=post.get("version", 0))
+    for field in extra:
+        post.pop(field, None)
+    entry = await response_cache.store(key, post, etag, tags)
+    return response_cache.respond(request, entry)
 
 # ✅ Update a Post (PATCH /posts/{id})
-@router.patch("/posts/{id}", response_model=ResponseMessage)
-async def update_post(id: str, update_data: dict):
+@router.patch("/posts/{id}", response_model=ForumPostOut)
+async def update_post(id: str, update_data: ForumPostUpdate, request: Request, db: Database):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid post ID format")
+    id = str(ObjectId(id))
 
-    update_fields = {key: value for key, value in update_data.items() if value is not None}
+    update_fields = update_data.dict(exclude_none=True)
     if not update_fields:
         raise HTTPException(status_code=400, detail="No valid fields to update")
 
-    result = await db.forumPost.update_one({"_id": ObjectId(id)}, {"$set": update_fields})
-
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Post not found or no changes applied")
+    with_title_key(update_fields)
+    post, modified = await update_versioned(db.forumPost, id, update_fields, request, POST_FIELDS, "Post not found")
+    if modified:
+        await response_cache.invalidate(f"post:{id}", "posts")
 
-    return {"message": "✅ Post updated successfully!"}
+    # The same representation and ETag as a plain GET /posts/{id}.
+    key = response_cache.cache_key("post", {"id": id})
+    etag = response_cache.make_etag(key, response_cache.post_version(post), version=post.get("version", 0))
+    entry = await response_cache.store(key, post, etag, [f"post:{id}"])
+    return response_cache.respond(request, entry)
 
 # ✅ Delete a Post (DELETE /posts/{id})
 @router.delete("/posts/{id}", response_model=ResponseMessage)
-async def delete_post(id: str):
+async def delete_post(id: str, db: Database):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid post ID format")
+    id = str(ObjectId(id))
 
-    result = await db.forumPost.delete_one({"_id": ObjectId(id)})
+    post_id = ObjectId(id)
+    result = await db.forumPost.delete_one({"_id": post_id})
+    await response_cache.invalidate(f"post:{id}", "posts")
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Post not found")
 
+    # Comments reference their post by string (API) or ObjectId (seed scripts).
+    comments = await db.forumComment.delete_many({"forumPost_id": {"$in": [post_id, id]}})
+    await counters.remove_posts(db, 1, comments.deleted_count)
     return {"message": "✅ Post deleted successfully!"}
 
+# ✅ Create a Comment (POST /comments/)
+@router.post("/comments/", response_model=ResponseMessage)
+async def create_comment(comment: ForumComment, db: Database):
+    post_id = to_object_id(comment.forumPost_id)
+    created_at = datetime.now(timezone.utc)
+
+    if not await db.forumPost.count_documents({"_id": post_id}, limit=1):
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    # Counters are bumped only once the comment is stored, so a failed insert
+    # cannot leave them too high.
+    comment_data = comment.dict(by_alias=True)
+    comment_data["_id"] = ObjectId()
+    comment_data["created_at"] = created_at
+    await db.forumComment.insert_one(comment_data)
+    if not await counters.add_comment(db, post_id, created_at):
+        # The post was deleted in between; don't leave an orphaned comment.
+        await db.forumComment.delete_one({"_id": comment_data["_id"]})
+        raise HTTPException(status_code=404, detail="Post not found")
+    await response_cache.invalidate(f"post:{post_id}", "posts")
+    return {"message": "✅ Comment created successfully!"}
+
+# ✅ Delete a Comment (DELETE /comments/{id})
+@router.delete("/comments/{id}", response_model=ResponseMessage)
+async def delete_comment(id: str, db: Database):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid comment ID format")
+
+    comment = await db.forumComment.find_one_and_delete({"_id": ObjectId(id)}, {"forumPost_id": 1})
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    post_id = to_object_id(comment["forumPost_id"])
+    await counters.remove_comments(db, post_id)
+    await response_cache.invalidate(f"post:{post_id}", "posts")
+    return {"message": "✅ Comment deleted successfully!"}
+
 @router.post("/create_user_and_post/")
-async def create_user_and_post(user: User, post: ForumPost):
-    session = await client.start_session() 
+async def create_user_and_post(user: User, post: ForumPost, db: Database):
+    hashed_password = await auth.get_password_hash(user.password)
+    user_data = user.dict(by_alias=True)
+    user_data["_id"] = ObjectId()
+    user_data["password"] = hashed_password
 
-    async with session.start_transaction():
-        user_data = user.dict(by_alias=True)
-        user_data["_id"] = ObjectId()
-        user_data["password"] = auth.get_password_hash(user.password)
-        await db.user.insert_one(user_data, session=session)
+    post_data = post.dict(by_alias=True)
+    post_data["_id"] = ObjectId()
+    post_data["created_at"] = datetime.now(timezone.utc)
+    post_data["comment_count"] = 0
+    with_title_key(post_data)
 
-        post_data = post.dict(by_alias=True)
-        post_data["_id"] = ObjectId()
+    # Documents are built before the transaction, so a retry only repeats the writes.
+    async def write(session):
+        await db.user.insert_one(user_data, session=session)
         await db.forumPost.insert_one(post_data, session=session)
 
+    try:
+        await transactions.run_in_transaction(db.client, write)
+    except DuplicateKeyError as exc:
+        raise duplicate_user_error(exc)
+
+    await counters.add_posts(db, 1)
+    await response_cache.invalidate("posts")
     return {"message": "✅ User and Post created successfully in transaction!"}
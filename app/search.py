@@ -0,0 +1,38 @@
+import re
+from pymongo import UpdateOne
+
+# Lower-cased copy of the title kept on every forumPost so autocomplete can use
+# an anchored, case-sensitive regex, which MongoDB turns into an index range scan.
+TITLE_KEY_FIELD = "title_lower"
+
+TEXT_INDEX = [("title", "text"), ("content", "text")]
+TEXT_INDEX_WEIGHTS = {"title": 10, "content": 1}
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.lower().split())
+
+
+def prefix_filter(prefix: str) -> dict:
+    return {TITLE_KEY_FIELD: {"$regex": "^" + re.escape(normalize_title(prefix))}}
+
+
+def with_title_key(post_data: dict) -> dict:
+    if isinstance(post_data.get("title"), str):
+        post_data[TITLE_KEY_FIELD] = normalize_title(post_data["title"])
+    return post_data
+
+
+def backfill_title_keys(db, batch_size: int = 1000) -> int:
+    # Synchronous (PyMongo) helper for the maintenance scripts.
+    updated = 0
+    batch = []
+    missing = {TITLE_KEY_FIELD: {"$exists": False}, "title": {"$type": "string"}}
+    for post in db.forumPost.find(missing, {"title": 1}):
+        batch.append(UpdateOne({"_id": post["_id"]}, {"$set": {TITLE_KEY_FIELD: normalize_title(post["title"])}}))
+        if len(batch) >= batch_size:
+            updated += db.forumPost.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += db.forumPost.bulk_write(batch, ordered=False).modified_count
+    return updated
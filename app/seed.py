@@ -0,0 +1,174 @@
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from app.counters import FORUM_STATS_ID, STATS_COLLECTION
+from app.database import MONGO_DB_NAME, MONGO_URI
+from app.datagen import Generator, Scale
+from app.indexes import reconcile
+
+# Seeds a database with a generated dataset (see app/datagen.py):
+#   python -m app.seed --classrooms 20000 --students 200000 --workers 8 --drop --indexes
+# Classrooms are split into ranges and each worker process generates and writes
+# its own range with unordered insert_many, so throughput scales with workers
+# until mongod is the bottleneck. Indexes are built after the load, which is
+# much faster than maintaining them during it.
+
+_worker = {}
+
+
+def _insert(db, collection: str, docs: list) -> int:
+    try:
+        return len(db[collection].insert_many(docs, ordered=False, bypass_document_validation=True).inserted_ids)
+    except BulkWriteError as e:
+        # Re-running with the same seed hits existing _ids; count what landed.
+        return e.details["nInserted"]
+
+
+def _init_worker(uri: str, db_name: str, scale: Scale, seed: int, batch_size: int):
+    generator = Generator(scale, seed)
+    generator.users()
+    _worker["client"] = MongoClient(uri)
+    _worker["db"] = _worker["client"][db_name]
+    _worker["generator"] = generator
+    _worker["batch_size"] = batch_size
+
+
+def _load_classrooms(start: int, stop: int) -> Counter:
+    db, generator, batch_size = _worker["db"], _worker["generator"], _worker["batch_size"]
+    pending = {}
+    written = Counter()
+    for index in range(start, stop):
+        for collection, docs in generator.classroom(index).items():
+            batch = pending.setdefault(collection, [])
+            batch.extend(docs)
+            if len(batch) >= batch_size:
+                written[collection] += _insert(db, collection, batch)
+                pending[collection] = []
+    for collection, batch in pending.items():
+        if batch:
+            written[collection] += _insert(db, collection, batch)
+    return written
+
+
+def load_users(db, generator: Generator, batch_size: int, workers: int) -> Counter:
+    written = Counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_insert, db, collection, docs[i:i + batch_size]): collection
+            for collection, docs in generator.users().items()
+            for i in range(0, len(docs), batch_size)
+        }
+        for future in as_completed(futures):
+            written[futures[future]] += future.result()
+    return written
+
+
+def seed(
+    uri: str,
+    db_name: str,
+    scale: Scale,
+    seed: int = 42,
+    workers: int = 4,
+    batch_size: int = 1000,
+    chunk: int = 50,
+    drop: bool = False,
+    indexes: bool = False,
+    progress=print,
+) -> dict:
+    client = MongoClient(uri)
+    if drop:
+        client.drop_database(db_name)
+    db = client[db_name]
+    started = time.perf_counter()
+
+    written = load_users(db, Generator(scale, seed), batch_size, workers)
+    ranges = [(i, min(i + chunk, scale.classrooms)) for i in range(0, scale.classrooms, chunk)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(uri, db_name, scale, seed, batch_size),
+    ) as pool:
+        futures = [pool.submit(_load_classrooms, start, stop) for start, stop in ranges]
+        for done, future in enumerate(as_completed(futures), 1):
+            written.update(future.result())
+            if progress:
+                elapsed = time.perf_counter() - started
+                total = sum(written.values())
+                progress(f"  {done}/{len(ranges)} chunks, {total} docs, {total / elapsed:.0f} docs/s")
+    load_seconds = time.perf_counter() - started
+
+    # Generated posts carry their comment_count; the global totals go in directly.
+    db[STATS_COLLECTION].update_one(
+        {"_id": FORUM_STATS_ID},
+        {"$set": {"posts": db.forumPost.estimated_document_count(), "comments": db.forumComment.estimated_document_count()}},
+        upsert=True,
+    )
+
+    index_seconds = None
+    if indexes:
+        index_started = time.perf_counter()
+        reconcile(db, apply=True)
+        index_seconds = time.perf_counter() - index_started
+    client.close()
+
+    documents = sum(written.values())
+    return {
+        "collections": dict(written),
+        "documents": documents,
+        "load_seconds": load_seconds,
+        "docs_per_second": documents / load_seconds if load_seconds else 0,
+        "index_seconds": index_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database with a generated, reproducible dataset.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--db", default=MONGO_DB_NAME)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--classrooms", type=int, default=1000)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--teachers", type=int)
+    parser.add_argument("--students-per-classroom", type=int, default=30)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--submissions", type=int, default=4)
+    parser.add_argument("--questions-per-test", type=int, default=5)
+    parser.add_argument("--posts-per-classroom", type=int, default=20)
+    parser.add_argument("--comments-per-post", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many")
+    parser.add_argument("--chunk", type=int, default=50, help="classrooms per worker task")
+    parser.add_argument("--drop", action="store_true", help="drop the database first")
+    parser.add_argument("--indexes", action="store_true", help="build the app/indexes.py indexes after loading")
+    args = parser.parse_args()
+
+    scale = Scale(
+        classrooms=args.classrooms,
+        students=args.students,
+        teachers=args.teachers,
+        students_per_classroom=args.students_per_classroom,
+        sections=args.sections,
+        submissions=args.submissions,
+        questions_per_test=args.questions_per_test,
+        posts_per_classroom=args.posts_per_classroom,
+        comments_per_post=args.comments_per_post,
+    )
+    print(f"Seeding {args.db} with {args.classrooms} classrooms using {args.workers} workers")
+    result = seed(
+        args.uri, args.db, scale,
+        seed=args.seed, workers=args.workers, batch_size=args.batch_size, chunk=args.chunk,
+        drop=args.drop, indexes=args.indexes,
+    )
+    for collection, count in sorted(result["collections"].items()):
+        print(f"  {collection:16}{count:>12}")
+    print(f"✅ Inserted {result['documents']} documents in {result['load_seconds']:.1f}s "
+          f"({result['docs_per_second']:.0f} docs/s)")
+    if result["index_seconds"] is not None:
+        print(f"✅ Built indexes in {result['index_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
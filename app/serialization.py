@@ -0,0 +1,37 @@
+import time
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+from app import metrics
+
+
+def bson_default(value):
+    # orjson handles datetime/UUID natively; this covers the BSON-only types.
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError
+
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value, default=bson_default, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+
+
+class BSONResponse(JSONResponse):
+    # Rendered with orjson; ObjectId/Decimal128 are encoded directly, so raw
+    # MongoDB documents can be returned without a str() pass over each field.
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        body = dumps(content)
+        metrics.record("serialization", time.perf_counter() - started)
+        return body
+
+
+def trusted_response(content, status_code: int = 200, headers: dict | None = None) -> BSONResponse:
+    # Returning a Response from a handler skips FastAPI's response_model
+    # validation and jsonable_encoder; only use it for documents read from
+    # our own collections with a projection matching the response model.
+    return BSONResponse(content, status_code=status_code, headers=headers)
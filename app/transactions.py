@@ -0,0 +1,93 @@
+import asyncio
+import os
+import random
+from pymongo import ReadPreference
+from pymongo.client_session import TransactionOptions
+from pymongo.errors import PyMongoError
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from dotenv import load_dotenv
+
+load_dotenv()
+TRANSACTION_MAX_ATTEMPTS = int(os.getenv("TRANSACTION_MAX_ATTEMPTS", "5"))
+TRANSACTION_BACKOFF_MS = float(os.getenv("TRANSACTION_BACKOFF_MS", "20"))
+TRANSACTION_MAX_BACKOFF_MS = float(os.getenv("TRANSACTION_MAX_BACKOFF_MS", "1000"))
+
+# "majority": snapshot reads and majority-acknowledged commits (durable
+# across failover). "local": faster, for writes that can be rebuilt.
+PRESETS = {
+    "majority": TransactionOptions(
+        read_concern=ReadConcern("snapshot"),
+        write_concern=WriteConcern("majority"),
+        read_preference=ReadPreference.PRIMARY,
+    ),
+    "local": TransactionOptions(
+        read_concern=ReadConcern("local"),
+        write_concern=WriteConcern(w=1),
+        read_preference=ReadPreference.PRIMARY,
+    ),
+}
+
+
+def _backoff(attempt: int) -> float:
+    # Exponential with jitter, so conflicting writers do not retry in lockstep.
+    delay = min(TRANSACTION_MAX_BACKOFF_MS, TRANSACTION_BACKOFF_MS * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.5) / 1000
+
+
+def _has_label(exc: Exception, label: str) -> bool:
+    return isinstance(exc, PyMongoError) and exc.has_error_label(label)
+
+
+async def _run(session, callback, options: TransactionOptions, max_attempts: int):
+    for attempt in range(1, max_attempts + 1):
+        session.start_transaction(
+            read_concern=options.read_concern,
+            write_concern=options.write_concern,
+            read_preference=options.read_preference,
+        )
+        try:
+            result = await callback(session)
+        except Exception as exc:
+            if session.in_transaction:
+                await session.abort_transaction()
+            if _has_label(exc, "TransientTransactionError") and attempt < max_attempts:
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            raise
+
+        # The commit may have been applied even if we never heard back; retrying
+        # it is safe, retrying the callback is not.
+        for commit_attempt in range(1, max_attempts + 1):
+            try:
+                await session.commit_transaction()
+                return result
+            except PyMongoError as exc:
+                if exc.has_error_label("UnknownTransactionCommitResult") and commit_attempt < max_attempts:
+                    await asyncio.sleep(_backoff(commit_attempt))
+                    continue
+                if exc.has_error_label("TransientTransactionError") and attempt < max_attempts:
+                    break
+                raise
+        await asyncio.sleep(_backoff(attempt))
+    raise RuntimeError("unreachable")
+
+
+async def run_in_transaction(
+    client,
+    callback,
+    preset: str = "majority",
+    session=None,
+    max_attempts: int = TRANSACTION_MAX_ATTEMPTS,
+):
+    # Runs `await callback(session)` in a transaction, like PyMongo's
+    # with_transaction: the whole callback is retried on
+    # TransientTransactionError and the commit on UnknownTransactionCommitResult,
+    # at most `max_attempts` times each. The callback must pass `session` to
+    # every operation and must not run them concurrently. Pass `session` to
+    # reuse one across several transactions.
+    options = PRESETS[preset]
+    if session is not None:
+        return await _run(session, callback, options, max_attempts)
+    async with await client.start_session() as own_session:
+        return await _run(own_session, callback, options, max_attempts)
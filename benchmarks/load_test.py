@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, deque
+import httpx
+from app.datagen import POST_TYPES, WORDS
+from benchmarks.stats import summarize
+
+# Drives the running API with a weighted mix of its hot endpoints and reports
+# per-route latency, histogram and error rate. Seed data first
+# (python -m app.seed), start the app, then e.g.:
+#   python -m benchmarks.load_test --concurrency 50 --duration 30 --save baseline.json
+#   python -m benchmarks.load_test --rps 400 --duration 30 --compare baseline.json
+# --compare exits with status 1 when a route regressed beyond --tolerance.
+
+DEFAULT_MIX = "list=35,deep=10,cursor=10,me=15,get=20,create=5,update=5"
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+HISTOGRAM_BUCKETS = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + ["inf"]
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+class Results:
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = Counter()
+
+    def record(self, route: str, seconds: float, status: int | None):
+        self.latencies.setdefault(route, []).append(seconds)
+        self.statuses.setdefault(route, Counter())[status or "error"] += 1
+        if status is None or status >= 400:
+            self.errors[route] += 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            histogram = Counter()
+            for seconds in samples:
+                ms = seconds * 1000
+                bucket = next((f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS if ms <= bound), "inf")
+                histogram[bucket] += 1
+            routes[route] = {
+                **summarize(samples),
+                "rps": len(samples) / elapsed,
+                "error_rate": self.errors[route] / len(samples),
+                "statuses": {str(status): count for status, count in self.statuses[route].items()},
+                "histogram": {bucket: histogram[bucket] for bucket in HISTOGRAM_BUCKETS if histogram[bucket]},
+            }
+        requests = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0,
+            "error_rate": sum(self.errors.values()) / requests if requests else 0,
+            "routes": routes,
+        }
+
+
+class Session:
+    # State shared by all workers: the token, known post ids and cursors to follow.
+    def __init__(self, client: httpx.AsyncClient, results: Results, rng: random.Random, max_page: int):
+        self.client = client
+        self.results = results
+        self.rng = rng
+        self.max_page = max_page
+        self.headers = {}
+        self.user_id = None
+        self.post_ids = []
+        self.own_post_ids = deque(maxlen=1000)
+        self.cursors = deque(maxlen=1000)
+
+    async def request(self, route: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.results.record(route, time.perf_counter() - started, None)
+            return None
+        self.results.record(route, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def login(self, username: str, password: str):
+        response = await self.client.post("/token", data={"username": username, "password": password, "scope": "me"})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        me = (await self.client.get("/users/me/", headers=self.headers)).json()
+        self.user_id = me.get("_id") or me.get("id")
+
+    async def discover_posts(self, limit: int):
+        response = await self.client.get("/posts/", params={"page_size": 100, "fields": "_id"})
+        while response.status_code == 200 and len(self.post_ids) < limit:
+            self.post_ids.extend(post["_id"] for post in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = await self.client.get("/posts/", params={"page_size": 100, "fields": "_id", "cursor": cursor})
+
+    def _filters(self) -> dict:
+        params = {"page_size": 20}
+        if self.rng.random() < 0.7:
+            params["post_type"] = self.rng.choice(POST_TYPES)
+        return params
+
+
+async def op_list(session: Session):
+    params = session._filters()
+    response = await session.request("GET /posts/", "GET", "/posts/", params=params)
+    if response is not None and response.headers.get("X-Next-Cursor"):
+        session.cursors.append((params, response.headers["X-Next-Cursor"]))
+
+
+async def op_deep(session: Session):
+    params = {**session._filters(), "page": session.rng.randint(2, session.max_page)}
+    await session.request("GET /posts/ (deep page)", "GET", "/posts/", params=params)
+
+
+async def op_cursor(session: Session):
+    if not session.cursors:
+        return await op_list(session)
+    params, cursor = session.cursors.popleft()
+    response = await session.request("GET /posts/ (cursor)", "GET", "/posts/", params={**params, "cursor": cursor})
+    if response is not None and response.headers.get("X-Next-Cursor"):
+        session.cursors.append((params, response.headers["X-Next-Cursor"]))
+
+
+async def op_me(session: Session):
+    await session.request("GET /users/me/", "GET", "/users/me/")
+
+
+async def op_get(session: Session):
+    if not session.post_ids:
+        return await op_list(session)
+    await session.request("GET /posts/{id}", "GET", f"/posts/{session.rng.choice(session.post_ids)}")
+
+
+async def op_create(session: Session):
+    title = " ".join(session.rng.choices(WORDS, k=5)).capitalize()
+    body = {"user_id": session.user_id, "title": title, "content": " ".join(session.rng.choices(WORDS, k=40)),
+            "type": session.rng.choice(POST_TYPES)}
+    response = await session.request("POST /posts/", "POST", "/posts/", json=body)
+    if response is not None and response.status_code == 200:
+        # Update traffic targets posts this run created.
+        session.own_post_ids.append(response.json()["id"])
+
+
+async def op_update(session: Session):
+    if not session.own_post_ids:
+        return await op_create(session)
+    post_id = session.rng.choice(session.own_post_ids)
+    body = {"content": " ".join(session.rng.choices(WORDS, k=40))}
+    await session.request("PATCH /posts/{id}", "PATCH", f"/posts/{post_id}", json=body)
+
+
+OPERATIONS = {
+    "list": op_list,
+    "deep": op_deep,
+    "cursor": op_cursor,
+    "me": op_me,
+    "get": op_get,
+    "create": op_create,
+    "update": op_update,
+}
+
+
+async def run_closed(session: Session, weights: dict, concurrency: int, deadline: float):
+    # Fixed concurrency: each worker issues its next request as soon as the last one returns.
+    names, values = list(weights), list(weights.values())
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await OPERATIONS[session.rng.choices(names, values)[0]](session)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open(session: Session, weights: dict, rps: float, max_in_flight: int, deadline: float):
+    # Target RPS: requests start on schedule whether or not earlier ones have
+    # finished, so server slowdowns show up as latency instead of lower load.
+    names, values = list(weights), list(weights.values())
+    limit = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    next_start = time.perf_counter()
+
+    async def fire(operation):
+        async with limit:
+            await operation(session)
+
+    while next_start < deadline:
+        await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+        task = asyncio.create_task(fire(OPERATIONS[session.rng.choices(names, values)[0]]))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_start += 1 / rps
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    results = Results()
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        session = Session(client, results, random.Random(args.seed), args.max_page)
+        await session.login(args.username, args.password)
+        await session.discover_posts(args.discover)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rps:
+            await run_open(session, weights, args.rps, args.max_in_flight, deadline)
+        else:
+            await run_closed(session, weights, args.concurrency, deadline)
+        elapsed = time.perf_counter() - started
+
+    report = results.report(elapsed)
+    report["config"] = {
+        "url": args.url, "mix": weights, "duration": args.duration,
+        "concurrency": None if args.rps else args.concurrency, "rps": args.rps,
+    }
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for route, current in report["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            continue
+        if before["p95"] and current["p95"] > before["p95"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {before['p95'] * 1000:.1f}ms -> {current['p95'] * 1000:.1f}ms")
+        if current["error_rate"] > before["error_rate"] + tolerance / 10:
+            regressions.append(f"{route}: error rate {before['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    if report["rps"] < baseline["rps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['rps']:.0f} -> {report['rps']:.0f} req/s")
+    return regressions
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    print(f"{report['requests']} requests in {report['elapsed_seconds']:.1f}s "
+          f"({report['rps']:.0f} req/s, {report['error_rate']:.2%} errors)")
+    print(f"{'route':26}{'count':>8}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    for route, row in report["routes"].items():
+        line = (f"{route:26}{row['count']:>8}{row['rps']:>8.0f}{row['p50'] * 1000:>9.1f}{row['p95'] * 1000:>9.1f}"
+                f"{row['p99'] * 1000:>9.1f}{row['max'] * 1000:>9.1f}{row['error_rate']:>8.1%}")
+        before = (baseline or {}).get("routes", {}).get(route)
+        if before and before["p95"]:
+            line += f"  p95 {(row['p95'] / before['p95'] - 1):+.0%} vs baseline"
+        print(line)
+    for route, row in report["routes"].items():
+        buckets = "  ".join(f"{bucket}:{count}" for bucket, count in row["histogram"].items())
+        print(f"  {route:24}{buckets}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API's hot endpoints.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="student_0", help="seeded users share the password 'password'")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations, default {DEFAULT_MIX}")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=20, help="closed-loop workers (ignored with --rps)")
+    parser.add_argument("--rps", type=float, help="open-loop target requests per second")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--max-page", type=int, default=200, help="deepest page for the deep-page operation")
+    parser.add_argument("--discover", type=int, default=2000, help="post ids to collect for GET /posts/{id}")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write the report as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import random
+import time
+from pymongo import MongoClient
+from app.classrooms import classroom_tree_pipeline
+from app.database import MONGO_DB_NAME, MONGO_URI
+from app.datagen import Generator, Scale, denormalize
+from app.indexes import reconcile
+from benchmarks.stats import summarize
+
+# Loads the same synthetic dataset into a normalized and a denormalized
+# database and measures insert throughput, classroom-tree reads, storage and
+# an aggregation on each. Run against a local mongod:
+#   python -m benchmarks.schema_benchmark --classrooms 500 --output report.json
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def load_normalized(db, generator: Generator, batch_size: int) -> dict:
+    pending = {}
+    docs_written = 0
+    elapsed = 0.0
+
+    def flush(collection):
+        nonlocal docs_written, elapsed
+        docs = pending.pop(collection, [])
+        if docs:
+            _, seconds = _timed(lambda: db[collection].insert_many(docs, ordered=False))
+            elapsed += seconds
+            docs_written += len(docs)
+
+    for collection, docs in generator.users().items():
+        pending[collection] = docs
+        flush(collection)
+    for index in range(generator.scale.classrooms):
+        for collection, docs in generator.classroom(index).items():
+            pending.setdefault(collection, []).extend(docs)
+            if len(pending[collection]) >= batch_size:
+                flush(collection)
+    for collection in list(pending):
+        flush(collection)
+    return {"documents": docs_written, "seconds": elapsed, "docs_per_second": docs_written / elapsed if elapsed else 0}
+
+
+def load_denormalized(db, generator: Generator, batch_size: int) -> dict:
+    pool = generator.users()
+    users = {user["_id"]: user for user in pool["user"]}
+    subjects = {subject["_id"]: subject for subject in pool["subject"]}
+    batch = []
+    docs_written = 0
+    elapsed = 0.0
+    for index in range(generator.scale.classrooms):
+        batch.append(denormalize(generator.classroom(index), users, subjects))
+        if len(batch) >= batch_size or index == generator.scale.classrooms - 1:
+            _, seconds = _timed(lambda: db.classroom.insert_many(batch, ordered=False))
+            elapsed += seconds
+            docs_written += len(batch)
+            batch = []
+    return {"documents": docs_written, "seconds": elapsed, "docs_per_second": docs_written / elapsed if elapsed else 0}
+
+
+def read_latency(fn, classroom_ids: list, reads: int, rng: random.Random) -> dict:
+    samples = []
+    for _ in range(reads):
+        classroom_id = rng.choice(classroom_ids)
+        _, seconds = _timed(lambda: fn(classroom_id))
+        samples.append(seconds)
+    return summarize(samples)
+
+
+def storage(db) -> dict:
+    stats = db.command("dbStats")
+    largest = next(db.classroom.aggregate([
+        {"$project": {"size": {"$bsonSize": "$$ROOT"}}},
+        {"$group": {"_id": None, "avg": {"$avg": "$size"}, "max": {"$max": "$size"}}},
+    ]), {})
+    return {
+        "data_bytes": stats["dataSize"],
+        "storage_bytes": stats["storageSize"],
+        "index_bytes": stats["indexSize"],
+        "classroom_avg_bytes": largest.get("avg"),
+        "classroom_max_bytes": largest.get("max"),
+    }
+
+
+NORMALIZED_AVG_COMMENTS = [
+    {"$lookup": {"from": "forumComment", "localField": "_id", "foreignField": "forumPost_id", "as": "comments"}},
+    {"$group": {"_id": None, "average_comments": {"$avg": {"$size": "$comments"}}}},
+]
+DENORMALIZED_AVG_COMMENTS = [
+    {"$unwind": "$forum_posts"},
+    {"$group": {"_id": None, "average_comments": {"$avg": {"$size": "$forum_posts.comments"}}}},
+]
+
+
+def aggregation_cost(collection, pipeline: list, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        _, seconds = _timed(lambda: list(collection.aggregate(pipeline, allowDiskUse=True)))
+        samples.append(seconds)
+    return summarize(samples)
+
+
+def run(args) -> dict:
+    client = MongoClient(args.uri)
+    scale = Scale(
+        classrooms=args.classrooms,
+        students=args.students,
+        students_per_classroom=args.students_per_classroom,
+        sections=args.sections,
+        submissions=args.submissions,
+        questions_per_test=args.questions_per_test,
+        posts_per_classroom=args.posts_per_classroom,
+        comments_per_post=args.comments_per_post,
+    )
+    normalized = client[f"{args.db_prefix}_normalized"]
+    denormalized = client[f"{args.db_prefix}_denormalized"]
+    client.drop_database(normalized.name)
+    client.drop_database(denormalized.name)
+
+    report = {"scale": vars(scale), "seed": args.seed, "normalized": {}, "denormalized": {}}
+
+    report["normalized"]["insert"] = load_normalized(normalized, Generator(scale, args.seed), args.batch_size)
+    _, seconds = _timed(lambda: reconcile(normalized, apply=True))
+    report["normalized"]["index_build_seconds"] = seconds
+    report["denormalized"]["insert"] = load_denormalized(denormalized, Generator(scale, args.seed), args.batch_size)
+
+    classroom_ids = normalized.classroom.distinct("_id")
+    rng = random.Random(args.seed)
+    report["normalized"]["tree_read"] = read_latency(
+        lambda classroom_id: list(normalized.classroom.aggregate(classroom_tree_pipeline({"_id": classroom_id}))),
+        classroom_ids, args.reads, rng,
+    )
+    report["denormalized"]["tree_read"] = read_latency(
+        lambda classroom_id: denormalized.classroom.find_one({"_id": classroom_id}),
+        classroom_ids, args.reads, rng,
+    )
+
+    report["normalized"]["storage"] = storage(normalized)
+    report["denormalized"]["storage"] = storage(denormalized)
+
+    report["normalized"]["avg_comments_aggregation"] = aggregation_cost(
+        normalized.forumPost, NORMALIZED_AVG_COMMENTS, args.aggregation_runs
+    )
+    report["denormalized"]["avg_comments_aggregation"] = aggregation_cost(
+        denormalized.classroom, DENORMALIZED_AVG_COMMENTS, args.aggregation_runs
+    )
+
+    if not args.keep:
+        client.drop_database(normalized.name)
+        client.drop_database(denormalized.name)
+    client.close()
+    return report
+
+
+def print_report(report: dict):
+    print(f"Scale: {report['scale']}")
+    rows = [
+        ("insert docs/s", lambda r: f"{r['insert']['docs_per_second']:.0f}"),
+        ("insert seconds", lambda r: f"{r['insert']['seconds']:.2f}"),
+        ("tree read p50 ms", lambda r: f"{r['tree_read']['p50'] * 1000:.2f}"),
+        ("tree read p95 ms", lambda r: f"{r['tree_read']['p95'] * 1000:.2f}"),
+        ("tree read p99 ms", lambda r: f"{r['tree_read']['p99'] * 1000:.2f}"),
+        ("tree reads/s", lambda r: f"{r['tree_read']['ops_per_second']:.0f}"),
+        ("data MB", lambda r: f"{r['storage']['data_bytes'] / 1e6:.1f}"),
+        ("storage MB", lambda r: f"{r['storage']['storage_bytes'] / 1e6:.1f}"),
+        ("index MB", lambda r: f"{r['storage']['index_bytes'] / 1e6:.1f}"),
+        ("classroom max KB", lambda r: f"{(r['storage']['classroom_max_bytes'] or 0) / 1e3:.1f}"),
+        ("avg-comments agg p50 ms", lambda r: f"{r['avg_comments_aggregation']['p50'] * 1000:.1f}"),
+    ]
+    print(f"{'':28}{'normalized':>14}{'denormalized':>14}")
+    for label, value in rows:
+        print(f"{label:28}{value(report['normalized']):>14}{value(report['denormalized']):>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the normalized and denormalized schemas.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--db-prefix", default=f"{MONGO_DB_NAME}_bench")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--classrooms", type=int, default=200)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--students-per-classroom", type=int, default=30)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--submissions", type=int, default=4)
+    parser.add_argument("--questions-per-test", type=int, default=5)
+    parser.add_argument("--posts-per-classroom", type=int, default=20)
+    parser.add_argument("--comments-per-post", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--aggregation-runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark databases afterwards")
+    parser.add_argument("--output", help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import math
+
+
+def percentile(sorted_samples: list[float], fraction: float) -> float:
+    # Nearest-rank percentile; `sorted_samples` must already be sorted.
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples: list[float]) -> dict:
+    # Latencies in seconds -> count, mean, p50/p95/p99, max and sequential ops/s.
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "mean": total / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+        "ops_per_second": len(ordered) / total if total else 0.0,
+    }
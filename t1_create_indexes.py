@@ -1,6 +1,8 @@
 import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from app.indexes import reconcile
+from app.search import backfill_title_keys
 
 load_dotenv()
 
@@ -9,13 +11,15 @@ client = MongoClient(MONGO_URI)
 db = client.education_website 
 
 def create_indexes():
-    db.users.create_index([("email", 1)])
-
-    db.classrooms.create_index([("teacher_id", 1)])
-
-    db.sectionFiles.create_index([("section_id", 1)])
-
-    db.forumPosts.create_index([("type", 1)])
+    # The index list lives in app/indexes.py (MANIFEST); this creates whatever is missing.
+    report = reconcile(db, apply=True)
+    for collection, result in report.items():
+        if result["missing"]:
+            print(f"{collection}: created {result['missing']}")
+        if result["drifted"]:
+            print(f"{collection}: differs from manifest {result['drifted']}")
+
+    print("Backfilled title keys:", backfill_title_keys(db))
 
     print("Indexes created successfully!")
 
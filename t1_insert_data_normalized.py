@@ -32,7 +32,7 @@ def insert_data():
             "role": "student"
         }
     ]
-    user_ids = [db.user.insert_one(user).inserted_id for user in users]
+    user_ids = db.user.insert_many(users).inserted_ids
 
     classroom = {
         "_id": ObjectId(),
@@ -100,7 +100,7 @@ def insert_data():
             "testQuestion_id": test_question_id
         }
     ]
-    question_ids = [db.question.insert_one(q).inserted_id for q in questions]
+    question_ids = db.question.insert_many(questions).inserted_ids
 
     answers = [
         {
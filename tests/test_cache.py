@@ -0,0 +1,88 @@
+from app.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(monkeypatch, maxsize=2, ttl=10):
+    clock = Clock()
+    monkeypatch.setattr("app.cache.time.monotonic", clock)
+    evicted = []
+    cache = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=lambda key, value: evicted.append((key, value)))
+    return cache, clock, evicted
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    cache, _, evicted = make_cache(monkeypatch)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert evicted == [("b", 2)]
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_expired_entry_is_a_miss_and_evicted(monkeypatch):
+    cache, clock, evicted = make_cache(monkeypatch)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert evicted == [("a", 1)]
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_overwrite_reports_previous_value(monkeypatch):
+    cache, _, evicted = make_cache(monkeypatch)
+    cache.set("a", 1)
+    cache.set("a", 2)
+    assert evicted == [("a", 1)] and cache.get("a") == 2 and len(cache) == 1
+
+
+def test_pop_discard_where_and_clear_report_evictions(monkeypatch):
+    cache, _, evicted = make_cache(monkeypatch, maxsize=10)
+    for key, value in (("a", 1), ("b", 2), ("c", 3), ("d", 4)):
+        cache.set(key, value)
+    assert cache.pop("a") == 1 and cache.pop("a") is None
+    cache.discard_where(lambda value: value % 2 == 0)
+    cache.clear()
+    assert evicted == [("a", 1), ("b", 2), ("d", 4), ("c", 3)]
+    assert len(cache) == 0
+
+
+def test_zero_ttl_or_size_stores_nothing(monkeypatch):
+    cache, _, evicted = make_cache(monkeypatch, maxsize=0)
+    cache.set("a", 1)
+    assert "a" not in cache and evicted == []
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+
+
+def test_response_cache_invalidates_only_tagged_entries():
+    import asyncio
+    from app.response_cache import CachedResponse, MemoryBackend
+
+    def entry(*tags):
+        return CachedResponse(b"{}", '"etag"', {}, tags)
+
+    async def run():
+        backend = MemoryBackend(maxsize=3, ttl=30)
+        await backend.set("post:1", entry("post:1", "posts"))
+        await backend.set("posts?page=1", entry("posts"))
+        await backend.set("user:1", entry("user:1"))
+        await backend.set("user:2", entry("user:2"))  # evicts post:1 and drops it from the index
+        assert backend._keys_by_tag == {"posts": {"posts?page=1"}, "user:1": {"user:1"}, "user:2": {"user:2"}}
+
+        await backend.invalidate({"posts", "user:1"})
+        assert await backend.get("posts?page=1") is None and await backend.get("user:1") is None
+        assert await backend.get("user:2") is not None
+        assert backend._keys_by_tag == {"user:2": {"user:2"}}
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from app.indexes import MANIFEST, diff_indexes
+from app.search import TEXT_INDEX, TEXT_INDEX_WEIGHTS
+
+# A text index as listIndexes reports it: keyed by _fts/_ftsx, with the weights.
+STORED_TEXT_INDEX = {
+    "v": 2, "key": {"_fts": "text", "_ftsx": 1}, "name": "forumPost_text",
+    "weights": {"title": 10, "content": 1}, "default_language": "english", "textIndexVersion": 3,
+}
+
+
+def test_stored_text_index_matches_manifest():
+    wanted = [IndexModel(TEXT_INDEX, weights=TEXT_INDEX_WEIGHTS, name="forumPost_text")]
+    missing, drifted, unmanaged = diff_indexes([STORED_TEXT_INDEX], wanted)
+    assert (missing, drifted, unmanaged) == ([], [], [])
+
+
+def test_text_index_with_other_weights_is_missing():
+    wanted = [IndexModel(TEXT_INDEX, weights={"title": 5, "content": 1})]
+    missing, drifted, unmanaged = diff_indexes([STORED_TEXT_INDEX], wanted)
+    assert missing == wanted and unmanaged == [STORED_TEXT_INDEX]
+
+
+def test_unique_option_difference_is_drift():
+    wanted = [IndexModel([("email", ASCENDING)], unique=True)]
+    existing = [
+        {"v": 2, "key": {"_id": 1}, "name": "_id_"},
+        {"v": 2, "key": {"email": 1.0}, "name": "email_1"},
+    ]
+    missing, drifted, unmanaged = diff_indexes(existing, wanted)
+    assert missing == [] and unmanaged == []
+    assert [spec["name"] for _, spec in drifted] == ["email_1"]
+
+
+def test_direction_matters():
+    wanted = [IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)])]
+    existing = [{"v": 2, "key": {"created_at": 1, "_id": 1}, "name": "created_at_1__id_1"}]
+    missing, _, unmanaged = diff_indexes(existing, wanted)
+    assert missing == wanted and len(unmanaged) == 1
+
+
+def test_manifest_does_not_repeat_reference_indexes():
+    # user_id is covered by the (user_id, created_at, _id) query index.
+    keys = [list(index.document["key"]) for index in MANIFEST["forumPost"]]
+    assert keys.count(["user_id"]) == 0
+    assert ["user_id", "created_at", "_id"] in keys
@@ -0,0 +1,52 @@
+import mongomock
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from app.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def test_null_value_ascending_continues_into_non_null_values():
+    last_id = ObjectId()
+    assert keyset_filter("title", "asc", None, last_id) == {
+        "$or": [{"title": {"$ne": None}}, {"title": None, "_id": {"$gt": last_id}}]
+    }
+
+
+def test_null_value_descending_stays_among_nulls():
+    last_id = ObjectId()
+    assert keyset_filter("title", "desc", None, last_id) == {"title": None, "_id": {"$lt": last_id}}
+
+
+def test_descending_value_also_matches_trailing_nulls():
+    last_id = ObjectId()
+    assert keyset_filter("title", "desc", "m", last_id) == {
+        "$or": [{"title": {"$lt": "m"}}, {"title": "m", "_id": {"$lt": last_id}}, {"title": None}]
+    }
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_document_once(order):
+    collection = mongomock.MongoClient().db.forumPost
+    values = [None, "a", "a", "b", None, "c", "b", "a"]
+    collection.insert_many([{"_id": ObjectId(), "title": value} for value in values])
+    collection.insert_one({"_id": ObjectId()})  # no title at all
+    direction = 1 if order == "asc" else -1
+
+    seen, query = [], {}
+    while True:
+        page = list(collection.find(query).sort([("title", direction), ("_id", direction)]).limit(2))
+        if not page:
+            break
+        seen += [doc["_id"] for doc in page]
+        value, last_id = decode_cursor(encode_cursor(page[-1], "title", order), "title", order)
+        query = keyset_filter("title", order, value, last_id)
+
+    expected = [doc["_id"] for doc in collection.find().sort([("title", direction), ("_id", direction)])]
+    assert seen == expected
+
+
+def test_cursor_for_another_sort_is_rejected():
+    cursor = encode_cursor({"_id": ObjectId(), "title": "a"}, "title", "asc")
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, "created_at", "asc")
+    assert exc.value.status_code == 400
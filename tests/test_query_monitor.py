@@ -0,0 +1,50 @@
+from bson import ObjectId
+from app.query_monitor import command_shape, explain_command, normalize, summarize_plan
+
+
+def test_literals_become_placeholders():
+    assert normalize({"user_id": ObjectId(), "type": "discuss", "n": 3}) == {"user_id": "?", "type": "?", "n": "?"}
+
+
+def test_operators_and_nesting_are_kept():
+    assert normalize({"_id": {"$in": [ObjectId(), ObjectId()]}, "$or": [{"a": 1}, {"b": 2}]}) == {
+        "_id": {"$in": ["?"]},
+        "$or": [{"a": "?"}, {"b": "?"}],
+    }
+
+
+def test_list_keeps_each_distinct_shape_once():
+    assert normalize([{"a": 1}, {"a": 2}, {"b": 3}, 4, 5]) == [{"a": "?"}, {"b": "?"}, "?"]
+
+
+def test_sort_and_projection_are_verbatim():
+    pipeline = [{"$match": {"type": "x"}}, {"$sort": {"created_at": -1}}, {"$project": {"title": 1}}]
+    assert normalize(pipeline, "pipeline") == [
+        {"$match": {"type": "?"}}, {"$sort": {"created_at": -1}}, {"$project": {"title": 1}},
+    ]
+
+
+def test_queries_differing_only_in_values_share_a_shape():
+    first = {"find": "forumPost", "filter": {"type": "a"}, "sort": {"_id": -1}, "lsid": {"id": 1}, "batchSize": 10}
+    second = {"find": "forumPost", "filter": {"type": "b"}, "sort": {"_id": -1}, "lsid": {"id": 2}}
+    assert command_shape("find", first) == command_shape("find", second) == {
+        "command": "find", "collection": "forumPost", "filter": {"type": "?"}, "sort": {"_id": -1},
+    }
+
+
+def test_merge_pipelines_and_inserts_are_not_explained():
+    assert explain_command("aggregate", {"aggregate": "c", "pipeline": [{"$merge": {"into": "x"}}]}) is None
+    assert explain_command("insert", {"insert": "c", "documents": []}) is None
+    explained = explain_command("update", {"update": "c", "updates": [{"q": {}}, {"q": {}}], "lsid": {}, "$db": "d"})
+    assert explained == {"update": "c", "updates": [{"q": {}}]}
+
+
+def test_summarize_plan_flags_collection_scans():
+    explain = {
+        "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+                         "rejectedPlans": [{"stage": "IXSCAN"}]},
+        "executionStats": {"nReturned": 1, "totalDocsExamined": 500, "totalKeysExamined": 0, "executionTimeMillis": 4},
+    }
+    plan = summarize_plan(explain)
+    assert plan["stages"] == ["SORT", "COLLSCAN"] and plan["collection_scan"]
+    assert plan["totalDocsExamined"] == 500